@@ -1,29 +1,1792 @@
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import logging
+import mmap
+import os
+import pickle
+import random
+import struct
+import sys
+import threading
+import time
+from array import array
 from collections import OrderedDict
-from typing import Any, Optional
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import Future
+from typing import Any, Optional, Union
+
+class CacheStats:
+    """
+    A class to hold the counters of an instrumented LRU_Cache.
+
+    Attributes:
+    -----------
+    hits : int
+        The number of lookups that found a live entry.
+    misses : int
+        The number of lookups that found nothing (including expired entries).
+    insertions : int
+        The number of keys newly stored in the cache.
+    evictions : int
+        The number of entries removed to make room for others.
+    expirations : int
+        The number of entries removed because their time to live ran out.
+    get_latency : Optional[list[int]]
+        A histogram of get() latencies, where bucket i counts calls that took
+        fewer than 2**i nanoseconds, or None if latency is not measured.
+    set_latency : Optional[list[int]]
+        The same histogram for set() calls.
+    """
+
+    BUCKETS = 64
+
+    def __init__(self, latency: bool = False) -> None:
+        """
+        Constructs all the necessary attributes for the CacheStats object.
+
+        Parameters:
+        -----------
+        latency : bool
+            Whether to keep latency histograms for get() and set().
+        """
+        self.hits = 0
+        self.misses = 0
+        self.insertions = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.get_latency: Optional[list[int]] = [0] * self.BUCKETS if latency else None
+        self.set_latency: Optional[list[int]] = [0] * self.BUCKETS if latency else None
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Get the fraction of lookups that were hits.
+
+        Returns:
+        --------
+        float
+            The hit ratio, or 0.0 before the first lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def percentile(histogram: list[int], fraction: float) -> int:
+        """
+        Estimate a latency percentile from a histogram.
+
+        Parameters:
+        -----------
+        histogram : list[int]
+            A get_latency or set_latency histogram.
+        fraction : float
+            The percentile as a fraction, for example 0.99.
+
+        Returns:
+        --------
+        int
+            The upper bound in nanoseconds of the bucket holding the percentile.
+        """
+        target = fraction * sum(histogram)
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                return 1 << bucket
+        return 0
+
+    def merge(self, other: 'CacheStats') -> None:
+        """
+        Add the counters of another CacheStats object to this one.
+
+        Parameters:
+        -----------
+        other : CacheStats
+            The counters to be added.
+        """
+        self.hits += other.hits
+        self.misses += other.misses
+        self.insertions += other.insertions
+        self.evictions += other.evictions
+        self.expirations += other.expirations
+        for mine, theirs in ((self.get_latency, other.get_latency), (self.set_latency, other.set_latency)):
+            if mine is not None and theirs is not None:
+                for bucket, count in enumerate(theirs):
+                    mine[bucket] += count
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Get the counters as a plain dictionary, for logging or exporting.
+
+        Returns:
+        --------
+        dict[str, Any]
+            The counters by name.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "insertions": self.insertions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hit_ratio,
+        }
+
 
 class LRU_Cache:
     """
-    A class to represent a Least Recently Used (LRU) cache.
+    A class to represent a Least Recently Used (LRU) cache.
+
+    Attributes:
+    -----------
+    capacity : int
+        The maximum number of items the cache can hold, or the maximum total
+        weight of its values when a sizeof callback is given.
+    cache : OrderedDict[int, Any]
+        The ordered dictionary to store cache items.
+    sizeof : Optional[Callable[[Any], int]]
+        The callback measuring the weight of a value, or None to count entries.
+    weights : dict[int, int]
+        The weight of each cached value (only used in weighted mode).
+    policy : Optional[TinyLFU]
+        The admission policy consulted before a new key may evict an old one,
+        or None for pure LRU.
+    ttl : Optional[float]
+        The default time to live of an entry in seconds, or None for no expiry.
+    expiry : dict[int, float]
+        The monotonic-clock deadline of every entry that has a time to live.
+    stats : Optional[CacheStats]
+        The hit/miss/eviction counters, or None when instrumentation is off.
+    on_evict : Optional[Callable[[int, Any], None]]
+        The callback receiving every key and value evicted to make room.
+    logger : Optional[logging.Logger]
+        The logger warned about writes to a zero-capacity cache, or of values
+        heavier than the capacity, if any.
+    disk_tier : Optional[DiskTier]
+        The on-disk second tier receiving evicted entries, if any.
+    """
+
+    def __init__(self, capacity: int, sizeof: Optional[Callable[[Any], int]] = None,
+                 policy: Optional['TinyLFU'] = None, ttl: Optional[float] = None,
+                 stats: bool = False, latency: bool = False,
+                 on_evict: Optional[Callable[[int, Any], None]] = None,
+                 logger: Optional[logging.Logger] = None,
+                 disk_tier: Optional['DiskTier'] = None) -> None:
+        """
+        Constructs all the necessary attributes for the LRU_Cache object.
+
+        Parameters:
+        -----------
+        capacity : int
+            The maximum number of items the cache can hold, or a weight budget
+            (for example in bytes) when sizeof is given.
+        sizeof : Optional[Callable[[Any], int]]
+            A callback returning the weight of a value, such as len or
+            sys.getsizeof. When given, the cache evicts least recently used
+            items until the total weight of its values fits within capacity.
+        policy : Optional[TinyLFU]
+            An admission policy such as TinyLFU. A new key that would force an
+            eviction is only stored if the policy admits it over the least
+            recently used key. Defaults to None (pure LRU, every key admitted).
+        ttl : Optional[float]
+            The default time to live of an entry in seconds. Expired entries
+            are treated as misses by get(). Defaults to None (no expiry).
+        stats : bool
+            Whether to count hits, misses, insertions, evictions and expirations.
+            When False, get() and set() run without any instrumentation code.
+        latency : bool
+            Whether to also keep get()/set() latency histograms (implies stats).
+        on_evict : Optional[Callable[[int, Any], None]]
+            A callback called with the key and value of every evicted entry.
+        logger : Optional[logging.Logger]
+            A logger warned when something is written to a zero-capacity cache,
+            or when a value heavier than the capacity is not stored.
+            Defaults to None (silent).
+        disk_tier : Optional[DiskTier]
+            A memory-mapped second tier. Evicted entries are demoted to it, and
+            get() falls through to it on a miss, promoting what it finds.
+        """
+        self.capacity = max(0, capacity)  # Ensure capacity is non-negative
+        self.cache = OrderedDict()
+        self.sizeof = sizeof
+        self.weights: dict[int, int] = {}
+        self._total_weight = 0
+        self.policy = policy
+        self.ttl = ttl
+        self.expiry: dict[int, float] = {}
+        # Min-heap of (deadline, sequence, key); entries whose deadline no longer
+        # matches self.expiry are stale and skipped when reaped
+        self._expiry_heap: list[tuple[float, int, int]] = []
+        self._sequence = itertools.count()
+        self.on_evict = on_evict
+        self.logger = logger
+        self.disk_tier = disk_tier
+        self.stats: Optional[CacheStats] = None
+        if stats or latency:
+            self.stats = CacheStats(latency)
+            # Shadow the plain methods on this instance only, so uninstrumented
+            # caches pay nothing for the counters
+            self.get = self._instrumented_get
+            self.set = self._instrumented_set
+            self.get_many = self._instrumented_get_many
+            self.set_many = self._instrumented_set_many
+
+    @property
+    def current_weight(self) -> int:
+        """
+        Get the total weight of the cached values. Without a sizeof callback
+        every entry weighs 1, so this is the number of cached items.
+
+        Returns:
+        --------
+        int
+            The total weight currently held by the cache.
+        """
+        if self.sizeof is None:
+            return len(self.cache)
+        return self._total_weight
+
+    def _evict_lru(self) -> None:
+        """
+        Remove the least recently used item (first key in OrderedDict).
+        """
+        key, value = self.cache.popitem(last=False)
+        if self.sizeof is not None:
+            self._total_weight -= self.weights.pop(key)
+        deadline = self.expiry.pop(key, None) if self.expiry else None
+        if self.disk_tier is not None:
+            self._demote(key, value, deadline)
+        if self.stats is not None:
+            self.stats.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def _demote(self, key: int, value: Any, deadline: Optional[float]) -> None:
+        """
+        Write an entry to the disk tier, converting its deadline to wall-clock
+        time so that it stays meaningful after a restart.
+
+        Parameters:
+        -----------
+        key : int
+            The key of the entry.
+        value : Any
+            The value of the entry.
+        deadline : Optional[float]
+            The monotonic-clock deadline of the entry, or None if it does not expire.
+        """
+        expires_at = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return  # Already expired, not worth keeping
+            expires_at = time.time() + remaining
+        self.disk_tier.put(key, value, expires_at)
+
+    def _promote(self, key: int) -> Optional[Any]:
+        """
+        Move an entry from the disk tier back into memory.
+
+        Parameters:
+        -----------
+        key : int
+            The key that missed in memory.
+
+        Returns:
+        --------
+        Optional[Any]
+            The value found on disk, otherwise -1.
+        """
+        found, value, expires_at = self.disk_tier.pop(key)
+        if not found:
+            return -1
+        ttl = None
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return -1
+        LRU_Cache.set(self, key, value, ttl)
+        if key not in self.cache:
+            # Not admitted into memory (too heavy or too cold), so keep it on disk
+            self.disk_tier.put(key, value, expires_at)
+        return value
+
+    def save_snapshot(self) -> None:
+        """
+        Write every entry held in memory to the disk tier, least recently used
+        first, and compact the tier file. A cache reopened on the same file
+        then starts warm.
+        """
+        for key, value in self.cache.items():
+            self._demote(key, value, self.expiry.get(key) if self.expiry else None)
+        self.disk_tier.compact()
+
+    def load_snapshot(self) -> int:
+        """
+        Promote the most recently written entries of the disk tier into memory,
+        up to the capacity of the cache, keeping their recency order.
+
+        Returns:
+        --------
+        int
+            The number of entries loaded into memory.
+        """
+        loaded = 0
+        for key in self.disk_tier.recent_keys(self.capacity):
+            self._promote(key)
+            loaded += key in self.cache  # Not by value, since -1 itself can be cached
+        return loaded
+
+    def _discard(self, key: int) -> None:
+        """
+        Remove a cached key together with its weight and deadline.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be removed.
+        """
+        del self.cache[key]
+        if self.sizeof is not None:
+            self._total_weight -= self.weights.pop(key)
+        self.expiry.pop(key, None)
+
+    def _set_expiry(self, key: int, ttl: Optional[float]) -> None:
+        """
+        Record the deadline of a freshly stored key, or clear it if the key does not expire.
+
+        Parameters:
+        -----------
+        key : int
+            The key that was stored.
+        ttl : Optional[float]
+            The time to live in seconds, or None to use the cache default.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is None:
+            self.expiry.pop(key, None)
+            return
+
+        deadline = time.monotonic() + ttl
+        self.expiry[key] = deadline
+        heapq.heappush(self._expiry_heap, (deadline, next(self._sequence), key))
+
+        # Rebuild the heap once stale entries (from overwrites and evictions) dominate it
+        if len(self._expiry_heap) > 2 * len(self.expiry) + 64:
+            self._expiry_heap = [(d, next(self._sequence), k) for k, d in self.expiry.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def _instrumented_get(self, key: int) -> Optional[Any]:
+        """
+        Run get() and count the hit or miss (and its latency, if measured).
+        """
+        histogram = self.stats.get_latency
+        if histogram is not None:
+            start = time.perf_counter_ns()
+            value = LRU_Cache.get(self, key)
+            histogram[min((time.perf_counter_ns() - start).bit_length(), CacheStats.BUCKETS - 1)] += 1
+        else:
+            value = LRU_Cache.get(self, key)
+
+        # Decided by presence, not by the value, since -1 itself can be cached
+        if self._holds(key):
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return value
+
+    def _holds(self, key: int) -> bool:
+        """
+        Check whether a key that was just looked up is held in memory or on disk.
+        A disk hit that was not admitted into memory is put back on disk, while
+        expired entries are dropped, so this tells hits from misses afterwards.
+        """
+        return key in self.cache or (self.disk_tier is not None and key in self.disk_tier)
+
+    def _instrumented_set(self, key: int, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Run set() and count the insertion (and its latency, if measured).
+        """
+        is_new = key not in self.cache
+        histogram = self.stats.set_latency
+        if histogram is not None:
+            start = time.perf_counter_ns()
+            LRU_Cache.set(self, key, value, ttl)
+            histogram[min((time.perf_counter_ns() - start).bit_length(), CacheStats.BUCKETS - 1)] += 1
+        else:
+            LRU_Cache.set(self, key, value, ttl)
+
+        if is_new and key in self.cache:
+            self.stats.insertions += 1
+
+    def _instrumented_get_many(self, keys: Iterable[int]) -> list[Any]:
+        """
+        Run get_many() and count its hits and misses.
+        """
+        if self.policy is not None or self.expiry or self.disk_tier is not None:
+            # A later promotion could evict an earlier hit, so check each key right after its lookup
+            results = []
+            hits = 0
+            for key in keys:
+                results.append(LRU_Cache.get(self, key))
+                hits += self._holds(key)
+        else:
+            # Nothing expires or moves between tiers, so the keys held now are the hits
+            keys = list(keys)
+            cache = self.cache
+            hits = sum(key in cache for key in keys)
+            results = LRU_Cache.get_many(self, keys)
+        self.stats.hits += hits
+        self.stats.misses += len(results) - hits
+        return results
+
+    def _instrumented_set_many(self, items: Union[Mapping[int, Any], Iterable[tuple[int, Any]]],
+                               ttl: Optional[float] = None) -> None:
+        """
+        Run set_many() one pair at a time, so insertions and evictions are
+        counted exactly as set() would count them.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        for key, value in items:
+            self._instrumented_set(key, value, ttl)
+
+    def clear(self) -> None:
+        """
+        Remove every item from the cache, including its disk tier.
+        """
+        if self.disk_tier is not None:
+            self.disk_tier.clear()
+        self.cache.clear()
+        self.weights.clear()
+        self._total_weight = 0
+        self.expiry.clear()
+        self._expiry_heap.clear()
+
+    def reap_expired(self, max_items: Optional[int] = None) -> int:
+        """
+        Remove expired entries in deadline order, oldest first, without scanning the cache.
+
+        Parameters:
+        -----------
+        max_items : Optional[int]
+            The maximum number of expired entries to remove in this call, so
+            callers holding a lock can reap in short batches. None removes all.
+
+        Returns:
+        --------
+        int
+            The number of entries removed.
+        """
+        heap = self._expiry_heap
+        now = time.monotonic()
+        removed = 0
+        while heap and heap[0][0] <= now and (max_items is None or removed < max_items):
+            deadline, _, key = heapq.heappop(heap)
+            if self.expiry.get(key) == deadline:
+                self._discard(key)
+                removed += 1
+        if self.stats is not None:
+            self.stats.expirations += removed
+        return removed
+
+    def _measure(self, value: Any) -> int:
+        """
+        Measure the weight of a value with the sizeof callback.
+
+        Parameters:
+        -----------
+        value : Any
+            The value to be measured.
+
+        Returns:
+        --------
+        int
+            The weight of the value.
+        """
+        weight = self.sizeof(value)
+        if weight < 0:
+            raise ValueError("sizeof must return a non-negative weight.")
+        return weight
+
+    def _insert_weighted(self, key: int, value: Any, weight: int) -> bool:
+        """
+        Insert or replace a key at the most recently used end without evicting.
+        A value heavier than the whole capacity is never stored, and any older
+        value for the key is dropped instead.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be inserted or updated in the cache.
+        value : Any
+            The value to be associated with the key.
+        weight : int
+            The weight of the value.
+
+        Returns:
+        --------
+        bool
+            True if the value was stored, False if it can never fit.
+        """
+        if key in self.cache:
+            del self.cache[key]
+            self._total_weight -= self.weights.pop(key)
+        if weight > self.capacity:
+            if self.expiry:
+                self.expiry.pop(key, None)
+            if self.logger is not None:
+                self.logger.warning("Value of weight %d exceeds the cache capacity of %d and is not stored.",
+                                    weight, self.capacity)
+            return False
+        self.cache[key] = value
+        self.weights[key] = weight
+        self._total_weight += weight
+        return True
+
+    def get(self, key: int) -> Optional[Any]:
+        """
+        Get the value of the key if the key exists in the cache, otherwise return -1.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be accessed in the cache.
+
+        Returns:
+        --------
+        Optional[Any]
+            The value associated with the key if it exists, otherwise -1.
+        """
+        if self.policy is not None:
+            self.policy.record(key)
+        if key in self.cache:
+            if self.expiry and self.expiry.get(key, float('inf')) <= time.monotonic():
+                # Expired entries are dropped lazily, only when they are looked up
+                self._discard(key)
+                if self.stats is not None:
+                    self.stats.expirations += 1
+                return -1
+            self.cache.move_to_end(key, last=True)  # Move the accessed item to the end
+            return self.cache[key]
+        if self.disk_tier is not None:
+            return self._promote(key)
+        return -1
+
+    def set(self, key: int, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Set or insert the value if the key is not already present. When the cache reaches 
+        its capacity, it should invalidate the least recently used item before inserting 
+        a new item.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be inserted or updated in the cache.
+        value : Any
+            The value to be associated with the key.
+        ttl : Optional[float]
+            The time to live of this entry in seconds, overriding the cache default.
+        """
+        if self.capacity == 0:
+            # If capacity is 0, do not store anything
+            if self.logger is not None:
+                self.logger.warning("Cache capacity is 0. No items can be stored.")
+            return
+
+        if self.policy is not None:
+            self.policy.record(key)
+
+        if self.disk_tier is not None:
+            # Memory becomes the only copy, so an older demoted value must not resurface
+            self.disk_tier.discard(key)
+
+        if self.sizeof is not None:
+            weight = self._measure(value)
+            if (self.policy is not None and key not in self.cache and self.cache
+                    and self._total_weight + weight > self.capacity
+                    and not self.policy.admit(key, next(iter(self.cache)))):
+                # The candidate is colder than the item it would evict
+                return
+            if self._insert_weighted(key, value, weight):
+                # Evict least recently used items until the budget fits again; the
+                # new value is the most recently used and fits on its own
+                while self._total_weight > self.capacity:
+                    self._evict_lru()
+                if ttl is not None or self.ttl is not None or self.expiry:
+                    self._set_expiry(key, ttl)
+            return
+
+        if key in self.cache:
+            # Update the value and move key to the end
+            self.cache.move_to_end(key, last=True)
+        else:
+            if len(self.cache) >= self.capacity:
+                if self.policy is not None and not self.policy.admit(key, next(iter(self.cache))):
+                    # The candidate is colder than the item it would evict
+                    return
+                # Remove the least recently used key (first key in OrderedDict)
+                self._evict_lru()
+        self.cache[key] = value
+        if ttl is not None or self.ttl is not None or self.expiry:
+            self._set_expiry(key, ttl)
+
+    def get_many(self, keys: Iterable[int]) -> list[Any]:
+        """
+        Get the values of a batch of keys in one call. Each hit is marked as
+        recently used in the order the keys are given, exactly as repeated
+        calls to get() would.
+
+        Parameters:
+        -----------
+        keys : Iterable[int]
+            The keys to be accessed in the cache.
+
+        Returns:
+        --------
+        list[Any]
+            The value for each key in the given order, or -1 for keys that are not cached.
+        """
+        if self.policy is not None or self.expiry or self.disk_tier is not None:
+            return [LRU_Cache.get(self, key) for key in keys]
+
+        cache = self.cache
+        move_to_end = cache.move_to_end
+        results = []
+        append = results.append
+        for key in keys:
+            if key in cache:
+                move_to_end(key, last=True)
+                append(cache[key])
+            else:
+                append(-1)
+        return results
+
+    def set_many(self, items: Union[Mapping[int, Any], Iterable[tuple[int, Any]]],
+                 ttl: Optional[float] = None) -> None:
+        """
+        Set or insert a batch of key/value pairs in one call. Evictions are done
+        once, after the whole batch is inserted, by removing least recently used
+        items until the cache is back within capacity (in weighted mode, also
+        before a value is replaced). The resulting contents and recency order
+        are the same as calling set() for each pair in turn. A key evicted and
+        re-inserted within the batch is never evicted at all, though, so with
+        an on_evict callback (or stats) the pairs are set one at a time, and
+        the callback and counters see exactly the evictions set() would make.
+
+        Parameters:
+        -----------
+        items : Union[Mapping[int, Any], Iterable[tuple[int, Any]]]
+            The key/value pairs to be inserted or updated, in order.
+        ttl : Optional[float]
+            The time to live of every entry in the batch, overriding the cache default.
+        """
+        if self.capacity == 0:
+            if self.logger is not None:
+                self.logger.warning("Cache capacity is 0. No items can be stored.")
+            return
+
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        if self.policy is not None or self.disk_tier is not None or self.on_evict is not None:
+            # Admission decisions, demotions and eviction callbacks depend on the state after every single insert
+            for key, value in items:
+                LRU_Cache.set(self, key, value, ttl)
+            return
+
+        expires = ttl is not None or self.ttl is not None or bool(self.expiry)
+
+        if self.sizeof is not None:
+            for key, value in items:
+                if key in self.cache and self._total_weight > self.capacity:
+                    # Replacing a value releases weight, so first settle the
+                    # evictions that set() would already have made by now
+                    while self._total_weight > self.capacity:
+                        self._evict_lru()
+                if self._insert_weighted(key, value, self._measure(value)) and expires:
+                    self._set_expiry(key, ttl)
+            while self._total_weight > self.capacity:
+                self._evict_lru()
+            return
+
+        cache = self.cache
+        move_to_end = cache.move_to_end
+        for key, value in items:
+            if key in cache:
+                move_to_end(key, last=True)
+            cache[key] = value
+            if expires:
+                self._set_expiry(key, ttl)
+
+        # Evict the least recently used keys that no longer fit
+        for _ in range(len(cache) - self.capacity):
+            self._evict_lru()
+
+
+class DiskTier:
+    """
+    A persistent second tier for LRU_Cache: an append-only file read through mmap.
+
+    Every record is a header (kind, key length, value length) followed by the
+    pickled key and the pickled (value, expires_at) pair. A put appends a new
+    record and a delete appends a tombstone. The in-memory index maps each
+    live key to the position of its value, so a lookup is one dictionary
+    access plus one read from the mapped file. Reopening a file rebuilds the
+    index from the keys only, without unpickling any values.
+
+    Overwritten records and tombstones are dead weight. Once they take up
+    more than compact_ratio of a file of at least min_compact_bytes, the file
+    is compacted automatically, so its size stays proportional to the live
+    entries. max_entries and max_bytes bound the live entries themselves:
+    when a put exceeds them, the oldest writes are dropped.
+
+    Attributes:
+    -----------
+    path : str
+        The path of the tier file.
+    index : dict[Any, tuple[int, int, int]]
+        The offset and length of the pickled value, and the size of the whole
+        record, of every live key, oldest write first.
+    max_entries : Optional[int]
+        The maximum number of live entries, or None for no limit.
+    max_bytes : Optional[int]
+        The maximum size of the live records in bytes, or None for no limit.
+    compact_ratio : float
+        The fraction of dead bytes in the file that triggers a compaction.
+    min_compact_bytes : int
+        The file size below which the file is never compacted automatically.
+    """
+
+    HEADER = struct.Struct('<BII')
+    PUT = 1
+    DELETE = 0
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 compact_ratio: float = 0.5, min_compact_bytes: int = 1 << 20) -> None:
+        """
+        Constructs all the necessary attributes for the DiskTier object, opening
+        (or creating) the file and rebuilding its index.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the tier file.
+        max_entries : Optional[int]
+            The maximum number of live entries, or None for no limit.
+        max_bytes : Optional[int]
+            The maximum size of the live records in bytes, or None for no limit.
+        compact_ratio : float
+            The fraction of dead bytes in the file that triggers a compaction.
+        min_compact_bytes : int
+            The file size below which the file is never compacted automatically.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.index: dict[Any, tuple[int, int, int]] = {}
+        self._file = open(path, 'ab+')
+        self._size = os.path.getsize(path)
+        self._live_bytes = 0  # Total size of the live records
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._load_index()
+        self._enforce_limits()
+
+    def __len__(self) -> int:
+        """
+        Get the number of live entries in the tier.
+
+        Returns:
+        --------
+        int
+            The number of keys stored.
+        """
+        return len(self.index)
+
+    def __contains__(self, key: Any) -> bool:
+        """
+        Check whether a key is stored in the tier.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be checked.
+
+        Returns:
+        --------
+        bool
+            True if the tier holds a value for the key.
+        """
+        return key in self.index
+
+    def _view(self, end: int) -> mmap.mmap:
+        """
+        Get a read-only mapping of the file covering at least the first end bytes,
+        remapping after appends.
+
+        Parameters:
+        -----------
+        end : int
+            The offset the mapping must reach.
+
+        Returns:
+        --------
+        mmap.mmap
+            The mapping of the file.
+        """
+        if self._map is None or end > self._mapped_size:
+            self._file.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map
+
+    def _load_index(self) -> None:
+        """
+        Rebuild the index by scanning the record headers and keys. A record
+        cut short by a crash is dropped by truncating the file.
+        """
+        if not self._size:
+            return
+        view = self._view(self._size)
+        offset = 0
+        while offset + self.HEADER.size <= self._size:
+            kind, key_length, value_length = self.HEADER.unpack_from(view, offset)
+            key_start = offset + self.HEADER.size
+            value_start = key_start + key_length
+            end = value_start + value_length
+            if end > self._size:
+                break
+            key = pickle.loads(view[key_start:value_start])
+            old = self.index.pop(key, None)
+            if old is not None:
+                self._live_bytes -= old[2]
+            if kind == self.PUT:
+                self.index[key] = (value_start, value_length, end - offset)
+                self._live_bytes += end - offset
+            offset = end
+
+        if offset < self._size:
+            # The mapping still covers the torn bytes, so drop it: later
+            # appends below its old size must be flushed and remapped
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+            self._file.truncate(offset)
+            self._size = offset
+
+    def _append(self, kind: int, key: Any, payload: bytes) -> tuple[int, int]:
+        """
+        Append one record to the file.
+
+        Parameters:
+        -----------
+        kind : int
+            PUT or DELETE.
+        key : Any
+            The key of the record.
+        payload : bytes
+            The pickled value, empty for a tombstone.
+
+        Returns:
+        --------
+        tuple[int, int]
+            The offset of the payload in the file and the size of the record.
+        """
+        # Called before the record is written, so the offsets below stay valid
+        self._maybe_compact()
+        key_bytes = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(self.HEADER.pack(kind, len(key_bytes), len(payload)))
+        self._file.write(key_bytes)
+        self._file.write(payload)
+        payload_start = self._size + self.HEADER.size + len(key_bytes)
+        self._size = payload_start + len(payload)
+        return payload_start, self.HEADER.size + len(key_bytes) + len(payload)
+
+    def put(self, key: Any, value: Any, expires_at: Optional[float] = None) -> None:
+        """
+        Store a value, replacing any older value of the key.
+
+        Parameters:
+        -----------
+        key : Any
+            The key of the entry.
+        value : Any
+            The value of the entry; must be picklable.
+        expires_at : Optional[float]
+            The wall-clock (time.time()) expiry of the entry, or None.
+        """
+        payload = pickle.dumps((value, expires_at), protocol=pickle.HIGHEST_PROTOCOL)
+        self._forget(key)  # Re-inserted below, so the index stays in write order
+        offset, record_size = self._append(self.PUT, key, payload)
+        self.index[key] = (offset, len(payload), record_size)
+        self._live_bytes += record_size
+        self._enforce_limits()
+
+    def pop(self, key: Any) -> tuple[bool, Any, Optional[float]]:
+        """
+        Remove and return the value of a key.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be looked up.
+
+        Returns:
+        --------
+        tuple[bool, Any, Optional[float]]
+            Whether the key was found, its value and its wall-clock expiry.
+        """
+        location = self.index.get(key)
+        if location is None:
+            return False, None, None
+        offset, length, _ = location
+        value, expires_at = pickle.loads(self._view(offset + length)[offset:offset + length])
+        self.discard(key)
+        return True, value, expires_at
+
+    def discard(self, key: Any) -> None:
+        """
+        Forget a key by appending a tombstone, if the key is stored.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be removed.
+        """
+        if self._forget(key):
+            self._append(self.DELETE, key, b'')
+
+    def _forget(self, key: Any) -> bool:
+        """
+        Remove a key from the index, without writing a tombstone.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be removed.
+
+        Returns:
+        --------
+        bool
+            True if the key was stored.
+        """
+        location = self.index.pop(key, None)
+        if location is None:
+            return False
+        self._live_bytes -= location[2]
+        return True
+
+    def _enforce_limits(self) -> None:
+        """
+        Drop the oldest writes until the live entries fit max_entries and max_bytes.
+        """
+        while self.index and ((self.max_entries is not None and len(self.index) > self.max_entries) or
+                              (self.max_bytes is not None and self._live_bytes > self.max_bytes)):
+            self.discard(next(iter(self.index)))
+
+    def _maybe_compact(self) -> None:
+        """
+        Compact the file once its dead bytes pass compact_ratio of its size.
+        """
+        if self._size >= self.min_compact_bytes and self._size - self._live_bytes > self.compact_ratio * self._size:
+            self.compact()
+
+    def recent_keys(self, limit: int) -> list[Any]:
+        """
+        Get the most recently written keys, oldest first.
+
+        Parameters:
+        -----------
+        limit : int
+            The maximum number of keys to return.
+
+        Returns:
+        --------
+        list[Any]
+            Up to limit keys in write order.
+        """
+        if limit <= 0:
+            return []
+        keys = list(self.index)
+        return keys[-limit:]
+
+    def compact(self) -> None:
+        """
+        Rewrite the file with only the live records, in write order, dropping
+        overwritten values and tombstones.
+        """
+        temporary_path = self.path + '.compact'
+        view = self._view(self._size) if self._size else None
+        index = {}
+        with open(temporary_path, 'wb') as output:
+            position = 0
+            for key, (offset, length, record_size) in self.index.items():
+                key_bytes = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+                output.write(self.HEADER.pack(self.PUT, len(key_bytes), length))
+                output.write(key_bytes)
+                output.write(view[offset:offset + length])
+                position += self.HEADER.size + len(key_bytes)
+                index[key] = (position, length, record_size)
+                position += length
+            output.flush()
+            os.fsync(output.fileno())
+
+        self.close()
+        os.replace(temporary_path, self.path)
+        self._file = open(self.path, 'ab+')
+        self._size = position
+        self._live_bytes = position
+        self.index = index
+
+    def clear(self) -> None:
+        """
+        Remove every entry by truncating the file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.truncate(0)
+        self._size = 0
+        self._live_bytes = 0
+        self.index.clear()
+
+    def flush(self) -> None:
+        """
+        Flush buffered records to the operating system.
+        """
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the file and its mapping.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class CountMinSketch:
+    """
+    A count-min sketch estimating how often keys were seen, in fixed memory.
+
+    Counters saturate at 15 (like the 4-bit counters of TinyLFU) and are all
+    halved once sample_size increments have been recorded, so estimates
+    favour recent popularity over all-time popularity.
+
+    Attributes:
+    -----------
+    depth : int
+        The number of counter rows (independent hash functions).
+    width : int
+        The number of counters per row, a power of two.
+    sample_size : int
+        The number of increments after which all counters are halved.
+    tables : list[array]
+        One row of counters per hash function.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width: int, depth: int = 4, sample_size: Optional[int] = None) -> None:
+        """
+        Constructs all the necessary attributes for the CountMinSketch object.
+
+        Parameters:
+        -----------
+        width : int
+            The minimum number of counters per row; rounded up to a power of two.
+        depth : int
+            The number of counter rows.
+        sample_size : Optional[int]
+            The number of increments between two halvings, defaulting to ten times the width.
+        """
+        self.width = 1 << max(4, (max(1, width) - 1).bit_length())
+        self.depth = depth
+        self.sample_size = sample_size or 10 * self.width
+        self.tables = [array('B', bytes(self.width)) for _ in range(depth)]
+        self._mask = self.width - 1
+        self._additions = 0
+
+    def _indexes(self, key: Any) -> list[int]:
+        """
+        Get the counter index of the key in every row, using double hashing.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be hashed.
+
+        Returns:
+        --------
+        list[int]
+            One counter index per row.
+        """
+        h = (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        step = (h >> 32) | 1
+        return [(h + i * step) & self._mask for i in range(self.depth)]
+
+    def increment(self, key: Any) -> None:
+        """
+        Record one occurrence of the key.
+
+        Parameters:
+        -----------
+        key : Any
+            The key that was seen.
+        """
+        for table, index in zip(self.tables, self._indexes(key)):
+            if table[index] < self.MAX_COUNT:
+                table[index] += 1
+
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: Any) -> int:
+        """
+        Estimate how often the key was seen. The estimate never undercounts
+        (until counters are halved) but may overcount because of collisions.
+
+        Parameters:
+        -----------
+        key : Any
+            The key to be looked up.
+
+        Returns:
+        --------
+        int
+            The smallest counter of the key across all rows.
+        """
+        return min(table[index] for table, index in zip(self.tables, self._indexes(key)))
+
+    def _reset(self) -> None:
+        """
+        Halve every counter so that old popularity fades away.
+        """
+        for i, table in enumerate(self.tables):
+            self.tables[i] = array('B', bytes(count >> 1 for count in table))
+        self._additions //= 2
+
+
+class TinyLFU:
+    """
+    A scan-resistant TinyLFU admission policy for LRU_Cache.
+
+    Every access is recorded in a count-min sketch. When a new key would
+    evict the least recently used key, it is only admitted if it has been
+    seen more often than that victim. Keys seen once, as in a full-table
+    scan, therefore cannot push out a frequently used hot set.
+
+    Attributes:
+    -----------
+    sketch : CountMinSketch
+        The frequency filter recording recent accesses.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Constructs all the necessary attributes for the TinyLFU object.
+
+        Parameters:
+        -----------
+        capacity : int
+            The capacity of the cache using this policy. The sketch gets about
+            four counters per cached key in each row, and its counters are
+            halved every ten capacities of accesses.
+        """
+        capacity = max(1, capacity)
+        self.sketch = CountMinSketch(4 * capacity, sample_size=10 * capacity)
+
+    def record(self, key: Any) -> None:
+        """
+        Record an access to the key.
+
+        Parameters:
+        -----------
+        key : Any
+            The key that was accessed.
+        """
+        self.sketch.increment(key)
+
+    def admit(self, candidate: Any, victim: Any) -> bool:
+        """
+        Decide whether the candidate may replace the victim in the cache.
+
+        Parameters:
+        -----------
+        candidate : Any
+            The new key waiting to be inserted.
+        victim : Any
+            The least recently used key that would be evicted.
+
+        Returns:
+        --------
+        bool
+            True if the candidate has been seen more often than the victim.
+        """
+        return self.sketch.estimate(candidate) > self.sketch.estimate(victim)
+
+
+class Sharded_LRU_Cache:
+    """
+    A thread-safe LRU cache that spreads keys across independent LRU_Cache shards.
+
+    Each shard has its own lock, so threads working on keys in different shards
+    never contend with each other. Recency is tracked per shard, which makes
+    eviction approximately (not strictly) LRU across the whole cache.
+
+    Attributes:
+    -----------
+    capacity : int
+        The maximum number of items the cache can hold across all shards.
+    shards : list[LRU_Cache]
+        The independent LRU_Cache segments.
+    locks : list[threading.Lock]
+        One lock per shard, guarding every access to that shard.
+    max_value_weight : int
+        The capacity of the smallest shard. With sizeof, a value heavier than
+        this may land in a shard it cannot fit in, and is then never stored.
+    reaper : Optional[threading.Thread]
+        The background thread removing expired entries, if started.
+    """
+
+    def __init__(self, capacity: int, num_shards: int = 16,
+                 policy_factory: Optional[Callable[[int], Any]] = None, **options: Any) -> None:
+        """
+        Constructs all the necessary attributes for the Sharded_LRU_Cache object.
+
+        Parameters:
+        -----------
+        capacity : int
+            The maximum number of items (or total weight) the cache can hold
+            across all shards.
+        num_shards : int
+            The number of shards to split the capacity between. It is reduced
+            when the capacity is too small to give every shard at least one slot.
+        policy_factory : Optional[Callable[[int], Any]]
+            A callable building an admission policy for a shard from its
+            capacity, such as TinyLFU, so no policy is shared between locks.
+        **options : Any
+            Extra keyword arguments passed to every LRU_Cache shard, such as
+            sizeof, ttl or stats. An on_evict callback runs under the shard lock.
+            disk_tier is rejected, since one DiskTier cannot be shared between
+            shards and their locks. With sizeof, each
+            shard holds only its share of the weight budget, so a single value
+            can weigh at most about capacity / num_shards (max_value_weight);
+            heavier values are skipped, with a warning if a logger is given.
+            Use fewer shards when values can be large.
+        """
+        if options.get("disk_tier") is not None:
+            raise ValueError("Sharded_LRU_Cache shards cannot share a disk_tier.")
+        self.capacity = max(0, capacity)
+        num_shards = max(1, min(num_shards, self.capacity))
+
+        # Split the capacity as evenly as possible; the first shards take the remainder
+        base, remainder = divmod(self.capacity, num_shards)
+        capacities = [base + (1 if i < remainder else 0) for i in range(num_shards)]
+        self.shards = [LRU_Cache(shard_capacity,
+                                 policy=policy_factory(shard_capacity) if policy_factory else None,
+                                 **options)
+                       for shard_capacity in capacities]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        self.max_value_weight = min(capacities)
+        self.reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+
+    @property
+    def current_weight(self) -> int:
+        """
+        Get the total weight of the cached values across all shards.
+
+        Returns:
+        --------
+        int
+            The total weight currently held by the cache.
+        """
+        return sum(shard.current_weight for shard in self.shards)
+
+    @property
+    def stats(self) -> Optional[CacheStats]:
+        """
+        Get the counters of all shards added together.
+
+        Returns:
+        --------
+        Optional[CacheStats]
+            A snapshot of the combined counters, or None if the shards are not instrumented.
+        """
+        if self.shards[0].stats is None:
+            return None
+        total = CacheStats(latency=self.shards[0].stats.get_latency is not None)
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                total.merge(shard.stats)
+        return total
+
+    def _shard_index(self, key: int) -> int:
+        """
+        Get the index of the shard responsible for the key.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be located.
+
+        Returns:
+        --------
+        int
+            The index of the shard that owns the key.
+        """
+        return hash(key) % len(self.shards)
+
+    def get(self, key: int) -> Optional[Any]:
+        """
+        Get the value of the key if the key exists in the cache, otherwise return -1.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be accessed in the cache.
+
+        Returns:
+        --------
+        Optional[Any]
+            The value associated with the key if it exists, otherwise -1.
+        """
+        index = self._shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].get(key)
+
+    def set(self, key: int, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Set or insert the value in the shard that owns the key, evicting that
+        shard's least recently used item when the shard is full.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be inserted or updated in the cache.
+        value : Any
+            The value to be associated with the key.
+        ttl : Optional[float]
+            The time to live of this entry in seconds, overriding the shard default.
+        """
+        index = self._shard_index(key)
+        with self.locks[index]:
+            self.shards[index].set(key, value, ttl)
+
+    def get_many(self, keys: Iterable[int]) -> list[Any]:
+        """
+        Get the values of a batch of keys, taking each shard's lock once per batch.
+
+        Parameters:
+        -----------
+        keys : Iterable[int]
+            The keys to be accessed in the cache.
+
+        Returns:
+        --------
+        list[Any]
+            The value for each key in the given order, or -1 for keys that are not cached.
+        """
+        keys = list(keys)
+        batches: dict[int, list[int]] = {}
+        for position, key in enumerate(keys):
+            batches.setdefault(self._shard_index(key), []).append(position)
+
+        results: list[Any] = [-1] * len(keys)
+        for index, positions in batches.items():
+            with self.locks[index]:
+                values = self.shards[index].get_many([keys[position] for position in positions])
+            for position, value in zip(positions, values):
+                results[position] = value
+        return results
+
+    def set_many(self, items: Union[Mapping[int, Any], Iterable[tuple[int, Any]]],
+                 ttl: Optional[float] = None) -> None:
+        """
+        Set or insert a batch of key/value pairs, taking each shard's lock once per batch.
+
+        Parameters:
+        -----------
+        items : Union[Mapping[int, Any], Iterable[tuple[int, Any]]]
+            The key/value pairs to be inserted or updated, in order.
+        ttl : Optional[float]
+            The time to live of every entry in the batch, overriding the shard default.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        batches: dict[int, list[tuple[int, Any]]] = {}
+        for key, value in items:
+            batches.setdefault(self._shard_index(key), []).append((key, value))
+
+        for index, batch in batches.items():
+            with self.locks[index]:
+                self.shards[index].set_many(batch, ttl)
+
+    def reap_expired(self, batch_size: int = 256) -> int:
+        """
+        Remove every expired entry, one shard and one batch at a time. A shard
+        lock is only held for a single batch, so readers of that shard wait for
+        at most batch_size removals and readers of other shards never wait.
+
+        Parameters:
+        -----------
+        batch_size : int
+            The maximum number of entries removed while holding a shard lock.
+
+        Returns:
+        --------
+        int
+            The number of entries removed.
+        """
+        removed = 0
+        for shard, lock in zip(self.shards, self.locks):
+            while True:
+                with lock:
+                    reaped = shard.reap_expired(batch_size)
+                removed += reaped
+                if reaped < batch_size:
+                    break
+        return removed
+
+    def start_reaper(self, interval: float = 1.0, batch_size: int = 256) -> None:
+        """
+        Start a daemon thread calling reap_expired() every interval seconds.
+
+        Parameters:
+        -----------
+        interval : float
+            The number of seconds between two reaping passes.
+        batch_size : int
+            The maximum number of entries removed while holding a shard lock.
+        """
+        if self.reaper is not None:
+            return
+        self._stop_reaper.clear()
+
+        def run() -> None:
+            while not self._stop_reaper.wait(interval):
+                self.reap_expired(batch_size)
+
+        self.reaper = threading.Thread(target=run, name="lru-cache-reaper", daemon=True)
+        self.reaper.start()
+
+    def stop_reaper(self) -> None:
+        """
+        Stop the background reaper thread and wait for it to exit.
+        """
+        if self.reaper is None:
+            return
+        self._stop_reaper.set()
+        self.reaper.join()
+        self.reaper = None
+
+
+def _make_key(args: tuple, kwargs: dict) -> Any:
+    """
+    Build a hashable cache key from a call's positional and keyword arguments.
+
+    Parameters:
+    -----------
+    args : tuple
+        The positional arguments of the call.
+    kwargs : dict
+        The keyword arguments of the call.
+
+    Returns:
+    --------
+    Any
+        A key that is equal for calls with equal arguments.
+    """
+    if not kwargs:
+        return args[0] if len(args) == 1 and type(args[0]) in (int, str) else args
+    return args + (_make_key,) + tuple(sorted(kwargs.items()))
+
+
+def lru_cached(capacity: int = 128, ttl: Optional[float] = None,
+               cache_exceptions: bool = False) -> Callable[[Callable], Callable]:
+    """
+    Memoize a function or coroutine function in an LRU_Cache.
+
+    Concurrent calls that miss on the same arguments share one in-flight
+    computation instead of each calling the function: threads wait on the
+    first caller's result, and coroutines await the same task. Exceptions are
+    passed to every waiting caller but are not cached unless cache_exceptions
+    is set. The decorated function exposes its cache as .cache and can be
+    emptied with .cache_clear().
+
+    Parameters:
+    -----------
+    capacity : int
+        The maximum number of results to keep.
+    ttl : Optional[float]
+        The time to live of each cached result in seconds, or None for no expiry.
+    cache_exceptions : bool
+        Whether a raised exception is cached and raised again on later calls.
+
+    Returns:
+    --------
+    Callable[[Callable], Callable]
+        The decorator to apply to the function.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = LRU_Cache(capacity, ttl=ttl)
+        lock = threading.Lock()
+        in_flight: dict[Any, Any] = {}
+
+        def store(key: Any, succeeded: bool, result: Any) -> None:
+            # Entries are (succeeded, result) pairs, so no result is mistaken for the -1 miss marker
+            with lock:
+                if succeeded or cache_exceptions:
+                    cache.set(key, (succeeded, result))
+                del in_flight[key]
+
+        def unwrap(entry: tuple[bool, Any]) -> Any:
+            succeeded, result = entry
+            if succeeded:
+                return result
+            raise result
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = _make_key(args, kwargs)
+                with lock:
+                    entry = cache.get(key)
+                    if entry != -1:
+                        return unwrap(entry)
+                    task = in_flight.get(key)
+                    if task is None:
+                        task = asyncio.ensure_future(compute(key, args, kwargs))
+                        in_flight[key] = task
+                # Shield the shared task so a cancelled caller does not cancel it for everyone
+                return await asyncio.shield(task)
+
+            async def compute(key: Any, args: tuple, kwargs: dict) -> Any:
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as exc:
+                    store(key, False, exc)
+                    raise
+                store(key, True, result)
+                return result
+
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = _make_key(args, kwargs)
+                with lock:
+                    entry = cache.get(key)
+                    if entry != -1:
+                        return unwrap(entry)
+                    future = in_flight.get(key)
+                    owner = future is None
+                    if owner:
+                        future = in_flight[key] = Future()
+                if not owner:
+                    return future.result()
+
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as exc:
+                    store(key, False, exc)
+                    future.set_exception(exc)
+                    raise
+                store(key, True, result)
+                future.set_result(result)
+                return result
+
+            wrapper = sync_wrapper
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+class Compact_LRU_Cache:
+    """
+    A memory-compact LRU cache for integer keys.
+
+    Instead of an OrderedDict node and a boxed int per entry, every entry lives
+    in a fixed slot of parallel arrays: keys, prev/next links of the recency
+    list and a list of values. An open-addressing hash table (linear probing,
+    at most half full) maps keys to slots. get() and set() have the same
+    semantics as LRU_Cache.
 
     Attributes:
     -----------
     capacity : int
         The maximum number of items the cache can hold.
-    cache : OrderedDict[int, Any]
-        The ordered dictionary to store cache items.
+    size : int
+        The number of slots in use.
+    keys : array
+        The key stored in each slot (64-bit signed integers).
+    values : list[Any]
+        The value stored in each slot.
+    prev : array
+        The slot of the next less recently used entry, or -1 for the head.
+    next : array
+        The slot of the next more recently used entry, or -1 for the tail.
+    table : array
+        The hash table of slots, with -1 marking an empty bucket.
+    head : int
+        The slot of the least recently used entry, or -1 if empty.
+    tail : int
+        The slot of the most recently used entry, or -1 if empty.
     """
 
     def __init__(self, capacity: int) -> None:
         """
-        Constructs all the necessary attributes for the LRU_Cache object.
+        Constructs all the necessary attributes for the Compact_LRU_Cache object.
+        All arrays are allocated up front for the full capacity.
 
         Parameters:
         -----------
         capacity : int
             The maximum number of items the cache can hold.
         """
-        self.capacity = max(0, capacity)  # Ensure capacity is non-negative
-        self.cache = OrderedDict()
+        self.capacity = max(0, capacity)
+        self.size = 0
+        self.head = -1
+        self.tail = -1
+
+        # 32-bit slot indexes unless the capacity needs more
+        index_type = 'i' if self.capacity < 2 ** 31 - 1 else 'q'
+        self.keys = array('q', bytes(8 * self.capacity))
+        self.values: list[Any] = [None] * self.capacity
+        self.prev = array(index_type, [-1]) * self.capacity
+        self.next = array(index_type, [-1]) * self.capacity
+
+        bits = max(1, (2 * self.capacity - 1).bit_length())
+        self._shift = 64 - bits
+        self._mask = (1 << bits) - 1
+        self.table = array(index_type, [-1]) * (1 << bits)
+
+    def _bucket(self, key: int) -> int:
+        """
+        Get the home bucket of a key using Fibonacci hashing, which spreads
+        sequential and strided keys evenly over the table.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be hashed.
+
+        Returns:
+        --------
+        int
+            The index of the key's home bucket.
+        """
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+
+    def _locate(self, key: int) -> tuple[int, int]:
+        """
+        Probe the hash table for a key.
+
+        Parameters:
+        -----------
+        key : int
+            The key to be found.
+
+        Returns:
+        --------
+        tuple[int, int]
+            The bucket holding the key and its slot, or the empty bucket where
+            the key would go and -1.
+        """
+        table = self.table
+        keys = self.keys
+        mask = self._mask
+        bucket = self._bucket(key)
+        while True:
+            slot = table[bucket]
+            if slot == -1 or keys[slot] == key:
+                return bucket, slot
+            bucket = (bucket + 1) & mask
+
+    def _remove_from_table(self, bucket: int) -> None:
+        """
+        Empty a bucket and shift later entries of its probe run backwards, so
+        lookups never need tombstones.
+
+        Parameters:
+        -----------
+        bucket : int
+            The bucket to be emptied.
+        """
+        table = self.table
+        mask = self._mask
+        table[bucket] = -1
+        current = bucket
+        while True:
+            current = (current + 1) & mask
+            slot = table[current]
+            if slot == -1:
+                return
+            home = self._bucket(self.keys[slot])
+            # Move the entry back unless its home lies cyclically in (bucket, current]
+            if (bucket < current and (home <= bucket or home > current)) or \
+                    (bucket > current and home <= bucket and home > current):
+                table[bucket] = slot
+                table[current] = -1
+                bucket = current
+
+    def _unlink(self, slot: int) -> None:
+        """
+        Remove a slot from the recency list.
+
+        Parameters:
+        -----------
+        slot : int
+            The slot to be removed.
+        """
+        before = self.prev[slot]
+        after = self.next[slot]
+        if before != -1:
+            self.next[before] = after
+        else:
+            self.head = after
+        if after != -1:
+            self.prev[after] = before
+        else:
+            self.tail = before
+
+    def _append(self, slot: int) -> None:
+        """
+        Add a slot at the most recently used end of the recency list.
+
+        Parameters:
+        -----------
+        slot : int
+            The slot to be added.
+        """
+        self.prev[slot] = self.tail
+        self.next[slot] = -1
+        if self.tail != -1:
+            self.next[self.tail] = slot
+        else:
+            self.head = slot
+        self.tail = slot
 
     def get(self, key: int) -> Optional[Any]:
         """
@@ -39,40 +1802,270 @@ class LRU_Cache:
         Optional[Any]
             The value associated with the key if it exists, otherwise -1.
         """
-        if key in self.cache:
-            self.cache.move_to_end(key, last=True)  # Move the accessed item to the end
-            return self.cache[key]
-        return -1
+        if not self.size:
+            return -1
+        _, slot = self._locate(key)
+        if slot == -1:
+            return -1
+        if slot != self.tail:
+            self._unlink(slot)
+            self._append(slot)
+        return self.values[slot]
 
     def set(self, key: int, value: Any) -> None:
         """
-        Set or insert the value if the key is not already present. When the cache reaches 
-        its capacity, it should invalidate the least recently used item before inserting 
-        a new item.
+        Set or insert the value if the key is not already present. When the cache
+        is full, the least recently used slot is reused for the new item.
 
         Parameters:
         -----------
         key : int
-            The key to be inserted or updated in the cache.
+            The key to be inserted or updated; must fit in a signed 64-bit integer.
         value : Any
             The value to be associated with the key.
         """
+        # Checked before any slot is unlinked, so a bad key leaves the cache intact
+        if not isinstance(key, int) or not -2 ** 63 <= key < 2 ** 63:
+            raise ValueError("Compact_LRU_Cache keys must be integers that fit in 64 bits.")
         if self.capacity == 0:
-            # If capacity is 0, do not store anything
-            print("Cache capacity is 0. No items can be stored.")
             return
 
-        if key in self.cache:
-            # Update the value and move key to the end
-            self.cache.move_to_end(key, last=True)
+        bucket, slot = self._locate(key)
+        if slot != -1:
+            self.values[slot] = value
+            if slot != self.tail:
+                self._unlink(slot)
+                self._append(slot)
+            return
+
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
         else:
-            if len(self.cache) >= self.capacity:
-                # Remove the least recently used key (first key in OrderedDict)
-                self.cache.popitem(last=False)
-        self.cache[key] = value
+            # Reuse the least recently used slot
+            slot = self.head
+            self._unlink(slot)
+            self._remove_from_table(self._locate(self.keys[slot])[0])
+            bucket, _ = self._locate(key)  # The probe run may have shifted
+
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.table[bucket] = slot
+        self._append(slot)
+
+
+def benchmark_compact_cache(num_entries: int = 1_000_000, num_ops: int = 500_000) -> None:
+    """
+    Print the memory per entry and the get/set throughput of LRU_Cache and Compact_LRU_Cache.
+
+    Parameters:
+    -----------
+    num_entries : int
+        The number of entries each cache is filled with (and its capacity).
+    num_ops : int
+        The number of mixed get/set operations timed on the full cache.
+    """
+    import tracemalloc
+
+    rng = random.Random(0)
+    keys = [rng.getrandbits(48) for _ in range(num_entries)]
+    workload = [rng.choice(keys) if rng.random() < 0.8 else rng.getrandbits(48) for _ in range(num_ops)]
+    value = object()  # One shared value, so only the cache's own overhead is measured
+
+    print(f"{'cache':>18} {'bytes/entry':>12} {'ops/s':>12}")
+    for cache_type in (LRU_Cache, Compact_LRU_Cache):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        cache = cache_type(num_entries)
+        for key in keys:
+            # Copy the key so that the cache owns its boxed int, as it would in a real workload
+            cache.set(key + 0, value)
+        per_entry = (tracemalloc.get_traced_memory()[0] - before) / num_entries
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for key in workload:
+            if cache.get(key) == -1:
+                cache.set(key, value)
+        rate = num_ops / (time.perf_counter() - start)
+        print(f"{cache_type.__name__:>18} {per_entry:>12.1f} {rate:>12,.0f}")
+        del cache
+
+
+def benchmark_sharded_cache(thread_counts: tuple[int, ...] = (1, 2, 4, 8, 16),
+                            ops_per_thread: int = 50_000,
+                            capacity: int = 10_000,
+                            num_keys: int = 20_000) -> None:
+    """
+    Print the throughput of a single-lock LRU_Cache and a Sharded_LRU_Cache
+    as the number of threads sharing the cache grows.
+
+    Parameters:
+    -----------
+    thread_counts : tuple[int, ...]
+        The thread counts to measure.
+    ops_per_thread : int
+        The number of get/set operations each thread performs.
+    capacity : int
+        The capacity of the caches under test.
+    num_keys : int
+        The size of the key space the threads draw from.
+    """
+    class Locked_LRU_Cache:
+        # The baseline: one LRU_Cache behind one global lock
+        def __init__(self, capacity: int) -> None:
+            self.cache = LRU_Cache(capacity)
+            self.lock = threading.Lock()
+
+        def get(self, key: int) -> Optional[Any]:
+            with self.lock:
+                return self.cache.get(key)
+
+        def set(self, key: int, value: Any) -> None:
+            with self.lock:
+                self.cache.set(key, value)
+
+    def worker(cache, keys: list[int]) -> None:
+        for key in keys:
+            if cache.get(key) == -1:
+                cache.set(key, key)
+
+    print(f"{'threads':>8} {'single lock ops/s':>18} {'sharded ops/s':>15}")
+    for threads in thread_counts:
+        rates = []
+        for cache in (Locked_LRU_Cache(capacity), Sharded_LRU_Cache(capacity)):
+            rng = random.Random(threads)
+            workloads = [[rng.randrange(num_keys) for _ in range(ops_per_thread)] for _ in range(threads)]
+            pool = [threading.Thread(target=worker, args=(cache, keys)) for keys in workloads]
+            start = time.perf_counter()
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+            rates.append(threads * ops_per_thread / (time.perf_counter() - start))
+        print(f"{threads:>8} {rates[0]:>18,.0f} {rates[1]:>15,.0f}")
+
+
+def zipf_trace(length: int, num_keys: int, skew: float = 1.0, seed: int = 0) -> list[int]:
+    """
+    Generate a synthetic access trace where key popularity follows a Zipf law.
+
+    Parameters:
+    -----------
+    length : int
+        The number of accesses in the trace.
+    num_keys : int
+        The number of distinct keys; key 0 is the most popular.
+    skew : float
+        The Zipf exponent; larger values concentrate accesses on fewer keys.
+    seed : int
+        The random seed, so traces are reproducible.
+
+    Returns:
+    --------
+    list[int]
+        The keys in access order.
+    """
+    cumulative = []
+    total = 0.0
+    for rank in range(1, num_keys + 1):
+        total += 1.0 / rank ** skew
+        cumulative.append(total)
+    return random.Random(seed).choices(range(num_keys), cum_weights=cumulative, k=length)
+
+
+def scan_trace(length: int, num_keys: int, scan_length: int, scan_every: int,
+               skew: float = 1.0, seed: int = 0) -> list[int]:
+    """
+    Generate a Zipfian trace interrupted by sequential scans over keys that are never reused.
+
+    Parameters:
+    -----------
+    length : int
+        The number of Zipfian accesses in the trace (scans come on top).
+    num_keys : int
+        The number of distinct keys in the Zipfian part.
+    scan_length : int
+        The number of keys touched by each scan.
+    scan_every : int
+        The number of Zipfian accesses between two scans.
+    skew : float
+        The Zipf exponent of the hot traffic.
+    seed : int
+        The random seed, so traces are reproducible.
+
+    Returns:
+    --------
+    list[int]
+        The keys in access order.
+    """
+    hot = zipf_trace(length, num_keys, skew, seed)
+    trace = []
+    next_scan_key = num_keys  # Scan keys never collide with hot keys
+    for start in range(0, length, scan_every):
+        trace.extend(hot[start:start + scan_every])
+        trace.extend(range(next_scan_key, next_scan_key + scan_length))
+        next_scan_key += scan_length
+    return trace
+
+
+def replay_trace(cache: Any, trace: Iterable[int]) -> float:
+    """
+    Replay a trace through a cache, loading every miss, and measure the hit ratio.
+
+    Parameters:
+    -----------
+    cache : Any
+        An object with the LRU_Cache get/set interface.
+    trace : Iterable[int]
+        The keys in access order.
+
+    Returns:
+    --------
+    float
+        The fraction of accesses that were hits.
+    """
+    hits = accesses = 0
+    for key in trace:
+        accesses += 1
+        if cache.get(key) == -1:
+            cache.set(key, True)
+        else:
+            hits += 1
+    return hits / accesses if accesses else 0.0
+
+
+def benchmark_policies(capacity: int = 1000, num_keys: int = 50_000, length: int = 200_000) -> None:
+    """
+    Print the hit ratio of pure LRU and TinyLFU admission on Zipfian and scan-heavy traces.
+
+    Parameters:
+    -----------
+    capacity : int
+        The capacity of the caches under test.
+    num_keys : int
+        The number of distinct keys in the Zipfian traffic.
+    length : int
+        The number of Zipfian accesses per trace.
+    """
+    workloads = {
+        "zipf": zipf_trace(length, num_keys),
+        "zipf + scans": scan_trace(length, num_keys, scan_length=2 * capacity, scan_every=capacity * 10),
+    }
+    print(f"{'workload':>14} {'LRU':>8} {'TinyLFU':>8}")
+    for name, trace in workloads.items():
+        lru = replay_trace(LRU_Cache(capacity), trace)
+        tiny_lfu = replay_trace(LRU_Cache(capacity, policy=TinyLFU(capacity)), trace)
+        print(f"{name:>14} {lru:>8.2%} {tiny_lfu:>8.2%}")
 
 
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_sharded_cache()
+        benchmark_policies()
+        benchmark_compact_cache()
+        sys.exit(0)
+
     # Testing the LRU_Cache class
 
     # Test Case 1: Basic functionality
@@ -125,4 +2118,382 @@ if __name__ == '__main__':
     high_capacity_cache.set(1, "high_capacity_value")
     assert high_capacity_cache.get(1) == "high_capacity_value"  # Returns "high_capacity_value"
 
+    # Test Case 7: Sharded cache splits the capacity and keeps get/set semantics
+    sharded_cache = Sharded_LRU_Cache(10, num_shards=4)
+    assert sum(shard.capacity for shard in sharded_cache.shards) == 10
+    for i in range(100):
+        sharded_cache.set(i, i * 2)
+    assert sum(len(shard.cache) for shard in sharded_cache.shards) == 10
+    assert sharded_cache.get(99) == 198  # Most recent key is still cached
+    assert sharded_cache.get(0) == -1  # Old keys were evicted from their shards
+
+    # Test Case 8: Sharded cache with fewer slots than shards, and with zero capacity
+    assert len(Sharded_LRU_Cache(3, num_shards=16).shards) == 3
+    assert Sharded_LRU_Cache(0).get(1) == -1
+
+    # Test Case 9: Concurrent access from several threads
+    shared_cache = Sharded_LRU_Cache(1000, num_shards=8)
+
+    def fill(offset: int) -> None:
+        for i in range(offset, offset + 250):
+            shared_cache.set(i, str(i))
+
+    fillers = [threading.Thread(target=fill, args=(n * 250,)) for n in range(4)]
+    for filler in fillers:
+        filler.start()
+    for filler in fillers:
+        filler.join()
+    assert all(shared_cache.get(i) == str(i) for i in range(1000))
+
+    # Test Case 10: Batch get/set matches one-at-a-time get/set, including eviction order
+    single_cache = LRU_Cache(4)
+    batch_cache = LRU_Cache(4)
+    pairs = [(1, "a"), (2, "b"), (3, "c"), (1, "A"), (4, "d"), (5, "e"), (6, "f")]
+    for key, value in pairs:
+        single_cache.set(key, value)
+    batch_cache.set_many(pairs)
+    assert list(batch_cache.cache.items()) == list(single_cache.cache.items())
+    assert batch_cache.get_many([6, 2, 4, 1]) == [single_cache.get(k) for k in (6, 2, 4, 1)]
+    assert list(batch_cache.cache) == list(single_cache.cache)  # Same recency order after hits
+
+    # Test Case 11: set_many accepts a mapping, and the sharded cache batches per shard
+    batch_cache.set_many({7: "g", 8: "h"})
+    assert batch_cache.get_many([7, 8, 99]) == ["g", "h", -1]
+    sharded_batch_cache = Sharded_LRU_Cache(100, num_shards=4)
+    sharded_batch_cache.set_many((i, i) for i in range(50))
+    assert sharded_batch_cache.get_many([49, 0, 500]) == [49, 0, -1]
+
+    # Test Case 12: Weighted mode evicts least recently used values until the new value fits
+    weighted_cache = LRU_Cache(10, sizeof=len)
+    weighted_cache.set(1, "aaaa")
+    weighted_cache.set(2, "bbbb")
+    assert weighted_cache.current_weight == 8
+    weighted_cache.get(1)
+    weighted_cache.set(3, "cccccc")  # Needs 6, so evicts key 2 (least recently used)
+    assert weighted_cache.get(2) == -1
+    assert weighted_cache.current_weight == 10
+    weighted_cache.set(1, "a")  # Replacing a value releases its old weight
+    assert weighted_cache.current_weight == 7
+
+    # Test Case 13: A value heavier than the whole budget is not stored and evicts nothing
+    weighted_cache.set(4, "x" * 11)
+    assert weighted_cache.get(4) == -1
+    assert weighted_cache.get(3) == "cccccc"
+    assert weighted_cache.current_weight == 7
+
+    # Test Case 14: Weighted set_many matches one-at-a-time set
+    single_weighted = LRU_Cache(12, sizeof=len)
+    batch_weighted = LRU_Cache(12, sizeof=len)
+    pairs = [(1, "aaaaa"), (2, "bb"), (3, "c" * 20), (1, "a"), (4, "dddddd"), (5, "eeee"), (2, "bbbbbbb")]
+    for key, value in pairs:
+        single_weighted.set(key, value)
+    batch_weighted.set_many(pairs)
+    assert list(batch_weighted.cache.items()) == list(single_weighted.cache.items())
+    assert batch_weighted.current_weight == single_weighted.current_weight <= 12
+
+    # Test Case 15: Sharded cache splits a byte budget between weighted shards
+    sharded_weighted = Sharded_LRU_Cache(1000, num_shards=4, sizeof=len)
+    for i in range(100):
+        sharded_weighted.set(i, "v" * 50)
+    assert sharded_weighted.current_weight <= 1000
+
+    # Test Case 16: Count-min sketch estimates never undercount before halving
+    sketch = CountMinSketch(64)
+    for _ in range(5):
+        sketch.increment("hot")
+    sketch.increment("cold")
+    assert sketch.estimate("hot") >= 5
+    assert sketch.estimate("hot") > sketch.estimate("never-seen")
+
+    # Test Case 17: A scan evicts the hot set under LRU but not under TinyLFU
+    lru_cache = LRU_Cache(100)
+    tiny_lfu_cache = LRU_Cache(100, policy=TinyLFU(100))
+    for cache in (lru_cache, tiny_lfu_cache):
+        for _ in range(5):
+            for key in range(100):
+                if cache.get(key) == -1:
+                    cache.set(key, key)
+        for key in range(1000, 1300):  # A scan over keys seen only once
+            if cache.get(key) == -1:
+                cache.set(key, key)
+    assert all(lru_cache.get(key) == -1 for key in range(100))
+    assert all(tiny_lfu_cache.get(key) == key for key in range(100))
+
+    # Test Case 18: TinyLFU scores at least as well as LRU on a scan-heavy trace
+    trace = scan_trace(20_000, 2_000, scan_length=200, scan_every=1_000)
+    assert replay_trace(LRU_Cache(100, policy=TinyLFU(100)), trace) >= replay_trace(LRU_Cache(100), trace)
+
+    # Test Case 19: Entries expire after their per-entry or default time to live
+    ttl_cache = LRU_Cache(10, ttl=0.05)
+    ttl_cache.set(1, "short")
+    ttl_cache.set(2, "long", ttl=60)
+    ttl_cache.set(3, "forever", ttl=None)  # None falls back to the cache default
+    time.sleep(0.06)
+    assert ttl_cache.get(1) == -1  # Expired, treated as a miss and dropped
+    assert ttl_cache.get(3) == -1
+    assert ttl_cache.get(2) == "long"
+    assert 1 not in ttl_cache.cache and 1 not in ttl_cache.expiry
+
+    # Test Case 20: reap_expired removes expired entries oldest first in bounded batches
+    reap_cache = LRU_Cache(100)
+    reap_cache.set_many(((i, i) for i in range(10)), ttl=0.01)
+    reap_cache.set(10, "fresh", ttl=60)
+    reap_cache.set(0, "renewed", ttl=60)  # The old deadline of key 0 is now stale
+    time.sleep(0.02)
+    assert reap_cache.reap_expired(max_items=4) == 4
+    assert reap_cache.reap_expired() == 5
+    assert list(reap_cache.cache) == [10, 0]
+
+    # Test Case 21: The background reaper clears expired entries in a sharded cache
+    reaped_cache = Sharded_LRU_Cache(1000, num_shards=4, ttl=0.02)
+    reaped_cache.set_many((i, i) for i in range(500))
+    reaped_cache.start_reaper(interval=0.01, batch_size=16)
+    time.sleep(0.1)
+    reaped_cache.stop_reaper()
+    assert reaped_cache.current_weight == 0
+
+    # Test Case 22: lru_cached memoizes a sync function by its arguments
+    calls = []
+
+    @lru_cached(capacity=2)
+    def square(x: int, offset: int = 0) -> int:
+        calls.append(x)
+        return x * x + offset
+
+    assert square(3) == 9 and square(3) == 9
+    assert square(3, offset=1) == 10  # Keyword arguments are part of the key
+    assert calls == [3, 3]
+    square(4)  # Evicts square(3) from the two-entry cache
+    square(3)
+    assert calls == [3, 3, 4, 3]
+    square.cache_clear()
+    square(3)
+    assert calls == [3, 3, 4, 3, 3]
+
+    # Test Case 23: Concurrent sync misses on one key share a single computation
+    started = threading.Event()
+    release = threading.Event()
+    slow_calls = []
+
+    @lru_cached(capacity=8)
+    def slow(x: int) -> int:
+        slow_calls.append(x)
+        started.set()
+        release.wait()
+        return x + 1
+
+    callers = [threading.Thread(target=slow, args=(1,)) for _ in range(5)]
+    for caller in callers:
+        caller.start()
+    started.wait()
+    time.sleep(0.02)  # Let the other callers reach the in-flight computation
+    release.set()
+    for caller in callers:
+        caller.join()
+    assert slow_calls == [1] and slow(1) == 2
+
+    # Test Case 24: Concurrent async misses are coalesced and exceptions are not cached
+    backend_calls = []
+
+    @lru_cached(capacity=8)
+    async def fetch(x: int) -> int:
+        backend_calls.append(x)
+        await asyncio.sleep(0.01)
+        if x < 0:
+            raise ValueError("negative key")
+        return x * 10
+
+    async def herd() -> None:
+        assert await asyncio.gather(*(fetch(7) for _ in range(50))) == [70] * 50
+        for _ in range(2):
+            try:
+                await fetch(-1)
+            except ValueError:
+                pass
+
+    asyncio.run(herd())
+    assert backend_calls == [7, -1, -1]  # The failure was retried, not cached
+
+    # Test Case 25: Instrumented caches count hits, misses, insertions and evictions
+    evicted = []
+    stats_cache = LRU_Cache(2, stats=True, on_evict=lambda key, value: evicted.append((key, value)))
+    stats_cache.set(1, "a")
+    stats_cache.set(2, "b")
+    stats_cache.set(1, "A")  # An update is not an insertion
+    stats_cache.set(3, "c")  # Evicts key 2
+    stats_cache.get(1)
+    stats_cache.get(2)
+    stats_cache.get_many([1, 3, 4])
+    stats_cache.set_many([(5, "e"), (6, "f")])  # Evicts keys 1 and 3
+    assert stats_cache.stats.as_dict() == {
+        "hits": 3, "misses": 2, "insertions": 5, "evictions": 3, "expirations": 0, "hit_ratio": 0.6,
+    }
+    assert evicted == [(2, "b"), (1, "A"), (3, "c")]
+    evicted.clear()
+    stats_cache.set_many([(7, "g"), (8, "h"), (9, "i"), (7, "G")])  # Key 7 is evicted, then re-inserted
+    assert evicted == [(5, "e"), (6, "f"), (7, "g"), (8, "h")]
+    assert (stats_cache.stats.insertions, stats_cache.stats.evictions) == (9, 7)
+    assert list(stats_cache.cache.items()) == [(9, "i"), (7, "G")]
+
+    # Test Case 26: Uninstrumented caches keep the plain methods, and latency histograms are optional
+    assert LRU_Cache(2).stats is None and LRU_Cache(2).get.__func__ is LRU_Cache.get
+    latency_cache = LRU_Cache(2, latency=True)
+    for i in range(100):
+        latency_cache.get(i)
+    assert sum(latency_cache.stats.get_latency) == 100
+    assert CacheStats.percentile(latency_cache.stats.get_latency, 0.99) > 0
+
+    # Test Case 27: Writes to a zero-capacity cache go to an opt-in logger instead of stdout
+    warnings = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            warnings.append(record.getMessage())
+
+    cache_logger = logging.getLogger("problem_1.test")
+    cache_logger.addHandler(ListHandler())
+    LRU_Cache(0, logger=cache_logger).set(1, "x")
+    assert warnings == ["Cache capacity is 0. No items can be stored."]
+
+    # Test Case 28: Sharded caches combine the counters of their shards
+    sharded_stats = Sharded_LRU_Cache(100, num_shards=4, stats=True)
+    sharded_stats.set_many((i, i) for i in range(10))
+    sharded_stats.get_many(range(20))
+    assert (sharded_stats.stats.hits, sharded_stats.stats.misses) == (10, 10)
+
+    # Test Case 29: The compact cache behaves like LRU_Cache on a random workload
+    rng = random.Random(42)
+    reference_cache = LRU_Cache(50)
+    compact_cache = Compact_LRU_Cache(50)
+    for _ in range(20_000):
+        key = rng.randrange(-100, 100)
+        if rng.random() < 0.5:
+            assert compact_cache.get(key) == reference_cache.get(key)
+        else:
+            reference_cache.set(key, key * 3)
+            compact_cache.set(key, key * 3)
+    assert compact_cache.size == len(reference_cache.cache)
+
+    # Test Case 30: Compact cache edge cases (zero capacity, capacity one, updates)
+    zero_compact = Compact_LRU_Cache(0)
+    zero_compact.set(1, "x")
+    assert zero_compact.get(1) == -1
+    one_compact = Compact_LRU_Cache(1)
+    one_compact.set(1, "a")
+    one_compact.set(1, "b")
+    assert one_compact.get(1) == "b"
+    one_compact.set(2, "c")
+    assert one_compact.get(1) == -1 and one_compact.get(2) == "c"
+
+    # Test Case 31: Evicted entries are demoted to the disk tier and promoted on a miss
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tier_dir:
+        tier_path = os.path.join(tier_dir, "cache.tier")
+        tiered_cache = LRU_Cache(2, disk_tier=DiskTier(tier_path))
+        tiered_cache.set(1, "one")
+        tiered_cache.set(2, "two")
+        tiered_cache.set(3, "three")  # Demotes key 1
+        assert 1 not in tiered_cache.cache and 1 in tiered_cache.disk_tier
+        assert tiered_cache.get(1) == "one"  # Promoted back, demoting key 2
+        assert 1 not in tiered_cache.disk_tier and 2 in tiered_cache.disk_tier
+        tiered_cache.set(2, "TWO")  # A new value replaces the demoted one
+        assert 2 not in tiered_cache.disk_tier
+        assert tiered_cache.get(4) == -1
+
+        # Test Case 32: A snapshot brings a restarted cache back warm
+        tiered_cache.save_snapshot()
+        tiered_cache.disk_tier.close()
+        restarted_cache = LRU_Cache(2, disk_tier=DiskTier(tier_path))
+        assert restarted_cache.load_snapshot() == 2
+        assert list(restarted_cache.cache) == [1, 2]  # Most recently used entries, in order
+        assert restarted_cache.get(2) == "TWO" and restarted_cache.get(3) == "three"
+        restarted_cache.disk_tier.close()
+        negative_path = os.path.join(tier_dir, "negative.tier")
+        negative_cache = LRU_Cache(2, disk_tier=DiskTier(negative_path))
+        negative_cache.set(1, -1)
+        negative_cache.save_snapshot()
+        negative_cache.disk_tier.close()
+        negative_cache = LRU_Cache(2, disk_tier=DiskTier(negative_path))
+        assert negative_cache.load_snapshot() == 1 and negative_cache.cache[1] == -1
+        negative_cache.disk_tier.close()
+
+        # Test Case 33: A record cut short by a crash is dropped when the file is reopened
+        with open(tier_path, 'ab') as tier_file:
+            tier_file.write(DiskTier.HEADER.pack(DiskTier.PUT, 100, 100) + b"partial")
+        recovered_tier = DiskTier(tier_path)
+        assert len(recovered_tier) == 1 and recovered_tier.pop(1)[1] == "one"
+        recovered_tier.put(999, "new value")  # Written where the torn record was
+        assert recovered_tier.pop(999)[1] == "new value"
+        recovered_tier.close()
+
+        # Test Case 34: Dead records are compacted away and max_entries bounds the live ones
+        churn_path = os.path.join(tier_dir, "churn.tier")
+        churn_cache = LRU_Cache(10, disk_tier=DiskTier(churn_path, min_compact_bytes=16_384))
+        churn_rng = random.Random(7)
+        for _ in range(20_000):
+            churn_key = churn_rng.randrange(100)
+            if churn_cache.get(churn_key) == -1:
+                churn_cache.set(churn_key, "x" * 100)
+        churn_cache.disk_tier.flush()
+        assert len(churn_cache.disk_tier) == 90
+        assert os.path.getsize(churn_path) < 2 * 16_384
+        churn_cache.disk_tier.close()
+        bounded_tier = DiskTier(os.path.join(tier_dir, "bounded.tier"), max_entries=3)
+        for bounded_key in range(10):
+            bounded_tier.put(bounded_key, bounded_key)
+        assert bounded_tier.recent_keys(10) == [7, 8, 9]
+        bounded_tier.close()
+
+    # Test Case 35: A key outside the 64-bit range is rejected without losing a slot
+    full_compact = Compact_LRU_Cache(2)
+    full_compact.set(1, "a")
+    full_compact.set(2, "b")
+    try:
+        full_compact.set(1 << 70, "x")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("oversized key accepted")
+    assert full_compact.get(1) == "a" and full_compact.get(2) == "b"
+    for key in range(3, 10):
+        full_compact.set(key, key)
+    assert full_compact.size == 2 and full_compact.get(8) == 8 and full_compact.get(9) == 9
+
+    # Test Case 36: A weighted sharded cache caps each value at one shard's budget
+    warnings.clear()
+    weighted_sharded = Sharded_LRU_Cache(1000, sizeof=len, logger=cache_logger)
+    assert weighted_sharded.max_value_weight == 62  # 1000 split over 16 shards
+    weighted_sharded.set(1, "x" * 100)  # Within the total budget, beyond a shard's
+    assert weighted_sharded.get(1) == -1 and weighted_sharded.current_weight == 0
+    assert len(warnings) == 1 and warnings[0].startswith("Value of weight 100 exceeds")
+    few_shards = Sharded_LRU_Cache(1000, num_shards=2, sizeof=len)
+    few_shards.set(1, "x" * 100)
+    assert few_shards.get(1) == "x" * 100
+
+    # Test Case 37: Cached values equal to -1 still count as hits
+    negative_stats = LRU_Cache(4, stats=True)
+    negative_stats.set(1, -1)
+    negative_stats.set(2, -1.0)
+    assert negative_stats.get(1) == -1 and negative_stats.get(3) == -1
+    assert negative_stats.get_many([1, 2, 3]) == [-1, -1.0, -1]
+    assert (negative_stats.stats.hits, negative_stats.stats.misses) == (3, 2)
+
+    class Uncomparable:
+        def __eq__(self, other):
+            raise TypeError("ambiguous comparison")  # Like a numpy array
+
+    uncomparable = Uncomparable()
+    negative_stats.set(5, uncomparable)
+    assert negative_stats.get(5) is uncomparable and negative_stats.get_many([5])[0] is uncomparable
+    assert negative_stats.stats.hits == 5
+
+    # Test Case 38: A sharded cache refuses a disk tier its shards would share
+    try:
+        Sharded_LRU_Cache(8, disk_tier=object())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("shared disk tier accepted")
+
     print("All test cases passed!")
@@ -1,13 +1,331 @@
+import asyncio
+import fnmatch
+import json
 import os
+import queue
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
-def find_files(suffix: str, path: str) -> list[str]:
+def _scan_dir(path: str) -> list[os.DirEntry]:
+    """
+    List a directory with os.scandir.
+
+    The returned DirEntry objects carry the file type reported by the
+    directory listing itself, so is_dir() and is_file() usually need no
+    extra stat call.
+
+    Parameters:
+    -----------
+    path : str
+        The directory to be listed.
+
+    Returns:
+    --------
+    list[os.DirEntry]
+        The entries of the directory, in listing order.
+    """
+    with os.scandir(path) as entries:
+        return list(entries)
+
+class _DirectoryFilter:
+    """
+    A class to decide which subdirectories a walk descends into.
+
+    A subdirectory is skipped if its name matches an exclude pattern, if it
+    lies deeper than max_depth, or if it is a symlink whose target's
+    (device, inode) pair has already been visited. Every cycle in a tree
+    passes through a symlink, so the last rule stops cycles and keeps a
+    target reached through several links from being walked more than once
+    through them. Only symlinks are stat'ed, so plain directories cost no
+    extra call.
+
+    Attributes:
+    -----------
+    max_depth : Optional[int]
+        The deepest level to descend to, or None for no limit.
+    visited : set[tuple[int, int]]
+        The (device, inode) pairs of the root and of the symlinked directories entered so far.
+    """
+
+    def __init__(self, root: str, exclude: Iterable[str] = (), max_depth: Optional[int] = None) -> None:
+        """
+        Constructs all the necessary attributes for the _DirectoryFilter object.
+
+        Parameters:
+        -----------
+        root : str
+            The directory the walk starts from; it counts as visited.
+        exclude : Iterable[str]
+            Glob patterns of directory names to skip.
+        max_depth : Optional[int]
+            The deepest level to descend to, or None for no limit.
+        """
+        patterns = [fnmatch.translate(pattern) for pattern in exclude]
+        self._exclude = re.compile("|".join(patterns)) if patterns else None
+        self.max_depth = max_depth
+        info = os.stat(root)
+        self.visited = {(info.st_dev, info.st_ino)}
+        self._lock = threading.Lock()  # Parallel walks share one filter
+
+    def allows(self, entry: os.DirEntry, depth: int) -> bool:
+        """
+        Check whether to descend into a subdirectory, marking it visited if so.
+
+        Parameters:
+        -----------
+        entry : os.DirEntry
+            The subdirectory found in a listing.
+        depth : int
+            Its level below the root (the root's own subdirectories are at depth 1).
+
+        Returns:
+        --------
+        bool
+            True if the walk should list the subdirectory.
+        """
+        return self.allows_path(entry.path, entry.name, depth, entry.is_symlink())
+
+    def allows_path(self, path: str, name: str, depth: int, is_symlink: bool) -> bool:
+        """
+        Check whether to descend into a subdirectory known by its path, marking it visited if so.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the subdirectory.
+        name : str
+            Its name.
+        depth : int
+            Its level below the root (the root's own subdirectories are at depth 1).
+        is_symlink : bool
+            Whether the entry is a symlink to a directory.
+
+        Returns:
+        --------
+        bool
+            True if the walk should list the subdirectory.
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        if self._exclude is not None and self._exclude.match(name):
+            return False
+        if not is_symlink:
+            return True
+        try:
+            info = os.stat(path)  # Follows the link to its target
+        except OSError:
+            return False
+        identity = (info.st_dev, info.st_ino)
+        with self._lock:
+            if identity in self.visited:
+                return False
+            self.visited.add(identity)
+        return True
+
+def _iter_file_entries(path: str, exclude: Iterable[str] = (),
+                       max_depth: Optional[int] = None) -> Iterator[os.DirEntry]:
+    """
+    Yield the DirEntry of every file beneath path, in depth-first order.
+
+    Only the listings of the directories on the current path are held in
+    memory, plus one (device, inode) pair per symlinked directory followed,
+    so memory grows with the depth of the tree rather than with the number
+    of files.
+
+    Parameters:
+    -----------
+    path : str
+        The root directory path where the walk should begin.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Yields:
+    -------
+    os.DirEntry
+        The entry of each file found.
+    """
+    # Check if the provided path is a directory
+    if not os.path.isdir(path):
+        return
+
+    directory_filter = _DirectoryFilter(path, exclude, max_depth)
+
+    # Use a stack of directory listings instead of recursion, so deep trees
+    # cannot hit the recursion limit; the order matches a depth-first walk
+    stack = [iter(_scan_dir(path))]
+
+    while stack:
+        entry = next(stack[-1], None)
+
+        # This directory is finished, go back to its parent
+        if entry is None:
+            stack.pop()
+            continue
+
+        # If entry is a directory, search inside it before its remaining siblings
+        if entry.is_dir():
+            if directory_filter.allows(entry, len(stack)):
+                stack.append(iter(_scan_dir(entry.path)))
+
+        elif entry.is_file():
+            yield entry
+
+def iter_files(suffix: str, path: str, exclude: Iterable[str] = (),
+               max_depth: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the files beneath path with file name suffix as soon as they are found,
+    so the first match arrives without waiting for the whole walk.
+
+    Parameters:
+    -----------
+    suffix : str
+        The suffix of the files to be found.
+    path : str
+        The root directory path where the search should begin.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Yields:
+    -------
+    str
+        The path of each file that ends with the given suffix, in depth-first order.
+    """
+    for entry in _iter_file_entries(path, exclude, max_depth):
+        if entry.name.endswith(suffix):
+            yield entry.path
+
+class PatternMatcher:
+    """
+    A class to match file names against many suffixes and glob patterns at once.
+
+    Plain suffixes (such as ".c") go into a trie of reversed suffixes, so one
+    walk backwards over a name finds every suffix it ends with. Glob patterns
+    (containing *, ? or [) are compiled into one combined regular expression
+    that rejects most names in a single call; only names it accepts are
+    checked against the individual globs.
+
+    Attributes:
+    -----------
+    patterns : list[str]
+        The patterns, in the order given.
+    """
+
+    _END = None  # Trie key holding the suffixes that end at a node
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """
+        Constructs all the necessary attributes for the PatternMatcher object.
+
+        Parameters:
+        -----------
+        patterns : Iterable[str]
+            Suffixes such as ".c" and glob patterns such as "test_*.py",
+            matched against file names (not full paths).
+        """
+        self.patterns = list(dict.fromkeys(patterns))
+        self._trie: dict = {}
+        self._globs: list[tuple[str, re.Pattern]] = []
+
+        for pattern in self.patterns:
+            if any(char in pattern for char in "*?["):
+                self._globs.append((pattern, re.compile(fnmatch.translate(pattern))))
+                continue
+            node = self._trie
+            for char in reversed(pattern):
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, []).append(pattern)
+
+        self._any_glob = None
+        if self._globs:
+            self._any_glob = re.compile("|".join(regex.pattern for _, regex in self._globs))
+
+    def match(self, name: str) -> list[str]:
+        """
+        Get every pattern that a file name matches.
+
+        Parameters:
+        -----------
+        name : str
+            The file name to be matched.
+
+        Returns:
+        --------
+        list[str]
+            The matching patterns (suffixes first, then globs).
+        """
+        matched = []
+        node = self._trie
+        if self._END in node:
+            matched.extend(node[self._END])  # The empty suffix matches everything
+        for char in reversed(name):
+            node = node.get(char)
+            if node is None:
+                break
+            if self._END in node:
+                matched.extend(node[self._END])
+
+        if self._any_glob is not None and self._any_glob.match(name):
+            matched.extend(pattern for pattern, regex in self._globs if regex.match(name))
+        return matched
+
+def find_files_multi(patterns: Iterable[str], path: str, exclude: Iterable[str] = (),
+                     max_depth: Optional[int] = None) -> dict[str, list[str]]:
+    """
+    Find the files beneath path matching any of several suffixes or glob
+    patterns, in a single walk of the tree.
+
+    Parameters:
+    -----------
+    patterns : Iterable[str]
+        Suffixes such as ".c" and glob patterns such as "test_*.py".
+    path : str
+        The root directory path where the search should begin.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Returns:
+    --------
+    dict[str, list[str]]
+        The matching file paths of each pattern, in depth-first order. A file
+        matching several patterns is listed under each of them.
+    """
+    matcher = PatternMatcher(patterns)
+    groups: dict[str, list[str]] = {pattern: [] for pattern in matcher.patterns}
+    for entry in _iter_file_entries(path, exclude, max_depth):
+        for pattern in matcher.match(entry.name):
+            groups[pattern].append(entry.path)
+    return groups
+
+def find_files(suffix: str, path: str, exclude: Iterable[str] = (),
+               max_depth: Optional[int] = None) -> list[str]:
     """
     Find all files beneath path with file name suffix.
 
     Note that a path may contain further subdirectories
     and those subdirectories may also contain further subdirectories.
 
-    There are no limit to the depth of the subdirectories can be.
+    There are no limit to the depth of the subdirectories can be,
+    unless max_depth is given, and each directory is searched only once
+    even if symbolic links lead to it again.
 
     Parameters:
     -----------
@@ -15,33 +333,621 @@ def find_files(suffix: str, path: str) -> list[str]:
         The suffix of the files to be found.
     path : str
         The root directory path where the search should begin.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
 
     Returns:
     --------
     list[str]
         A list of file paths that end with the given suffix.
     """
-    result = []
+    return list(iter_files(suffix, path, exclude, max_depth))
 
-    # Check if the provided path is a directory
+def iter_files_parallel(suffix: str, path: str, workers: int = 8, exclude: Iterable[str] = (),
+                        max_depth: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the files beneath path with file name suffix, listing directories
+    in parallel on a thread pool. Matches arrive in no particular order.
+
+    Every worker has its own deque of directories to list. It takes work from
+    the back of its own deque (depth-first, good locality) and, when that is
+    empty, steals from the front of another worker's deque (the oldest
+    directories, which tend to have the biggest subtrees left).
+
+    Parameters:
+    -----------
+    suffix : str
+        The suffix of the files to be found.
+    path : str
+        The root directory path where the search should begin.
+    workers : int
+        The number of threads listing directories.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Yields:
+    -------
+    str
+        The path of each file that ends with the given suffix.
+    """
     if not os.path.isdir(path):
-        return result
+        return
+
+    workers = max(1, workers)
+    directory_filter = _DirectoryFilter(path, exclude, max_depth)
+    deques = [deque() for _ in range(workers)]
+    deques[0].append((path, 0))
+    pending = 1  # Directories queued or being listed
+    condition = threading.Condition()
+    results: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    def next_directory(me: int) -> Optional[tuple[str, int]]:
+        try:
+            return deques[me].pop()
+        except IndexError:
+            pass
+        for offset in range(1, workers):
+            try:
+                return deques[(me + offset) % workers].popleft()
+            except IndexError:
+                continue
+        return None
 
-    # List all items in the directory
-    for entry in os.listdir(path):
-        entry_path = os.path.join(path, entry)
+    def work(me: int) -> None:
+        nonlocal pending
+        try:
+            while not stop.is_set():
+                work_item = next_directory(me)
+                if work_item is None:
+                    with condition:
+                        if pending == 0:
+                            return
+                        # Work pushed before we took the lock is visible here;
+                        # anything pushed later comes with a notify
+                        if not any(deques):
+                            condition.wait(0.1)
+                    continue
 
-        # If entry is a directory, recursively search inside it
-        if os.path.isdir(entry_path):
-            result.extend(find_files(suffix, entry_path))
-        
-        # If entry is a file and ends with the specified suffix, add to result
-        elif os.path.isfile(entry_path) and entry.endswith(suffix):
-            result.append(entry_path)
+                directory, depth = work_item
+                matches = []
+                subdirectories = []
+                for entry in _scan_dir(directory):
+                    if entry.is_dir():
+                        if directory_filter.allows(entry, depth + 1):
+                            subdirectories.append((entry.path, depth + 1))
+                    elif entry.is_file() and entry.name.endswith(suffix):
+                        matches.append(entry.path)
+                if matches:
+                    results.put(matches)
+                deques[me].extend(subdirectories)
 
+                with condition:
+                    pending += len(subdirectories) - 1
+                    if pending == 0:
+                        results.put(finished)
+                        condition.notify_all()
+                    elif subdirectories:
+                        condition.notify(len(subdirectories))
+        except BaseException as exc:
+            # Hand the error to the consumer and stop the other workers
+            results.put(exc)
+            stop.set()
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="find_files")
+    for me in range(workers):
+        pool.submit(work, me)
+    try:
+        while True:
+            item = results.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        # Also reached when the consumer stops early: let the workers exit
+        stop.set()
+        with condition:
+            condition.notify_all()
+        pool.shutdown(wait=True)
+
+def find_files_parallel(suffix: str, path: str, workers: int = 8, sort: bool = True,
+                        exclude: Iterable[str] = (), max_depth: Optional[int] = None) -> list[str]:
+    """
+    Find all files beneath path with file name suffix using parallel directory listing.
+
+    Parameters:
+    -----------
+    suffix : str
+        The suffix of the files to be found.
+    path : str
+        The root directory path where the search should begin.
+    workers : int
+        The number of threads listing directories.
+    sort : bool
+        Whether to sort the result, so it is the same from run to run.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Returns:
+    --------
+    list[str]
+        A list of file paths that end with the given suffix.
+    """
+    result = list(iter_files_parallel(suffix, path, workers, exclude, max_depth))
+    if sort:
+        result.sort()
     return result
 
+async def afind_files(suffix: str, path: str, concurrency: int = 4, max_pending: int = 256,
+                      exclude: Iterable[str] = (), max_depth: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Yield the files beneath path with file name suffix without blocking the event loop.
+
+    Directory listings run on a thread pool of `concurrency` threads while the
+    loop stays free. Matches wait in a queue of at most max_pending paths;
+    when the consumer falls behind, the workers stop listing until it catches
+    up. Leaving the `async for` early (or cancelling the consumer) cancels the
+    workers and any listings not yet started. Matches arrive in no particular order.
+
+    Parameters:
+    -----------
+    suffix : str
+        The suffix of the files to be found.
+    path : str
+        The root directory path where the search should begin.
+    concurrency : int
+        The maximum number of directories listed at the same time.
+    max_pending : int
+        The maximum number of matches buffered for the consumer.
+    exclude : Iterable[str]
+        Glob patterns of directory names (such as ".git" or "vendor*") whose
+        subtrees are never listed.
+    max_depth : Optional[int]
+        How many levels below path to descend; 0 searches path itself only.
+        Defaults to None (no limit).
+
+    Yields:
+    -------
+    str
+        The path of each file that ends with the given suffix.
+    """
+    loop = asyncio.get_running_loop()
+    concurrency = max(1, concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="afind_files")
+    directories: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_pending))
+    finished = object()
+    tasks: list[asyncio.Task] = []
+
+    def list_directory(directory: str, depth: int) -> tuple[list[str], list[tuple[str, int]]]:
+        # Runs on the thread pool: the listing and the stat calls of the filter both block
+        matches = []
+        subdirectories = []
+        for entry in _scan_dir(directory):
+            if entry.is_dir():
+                if directory_filter.allows(entry, depth + 1):
+                    subdirectories.append((entry.path, depth + 1))
+            elif entry.is_file() and entry.name.endswith(suffix):
+                matches.append(entry.path)
+        return matches, subdirectories
+
+    async def work() -> None:
+        while True:
+            directory, depth = await directories.get()
+            try:
+                matches, subdirectories = await loop.run_in_executor(executor, list_directory, directory, depth)
+                for subdirectory in subdirectories:
+                    directories.put_nowait(subdirectory)
+                for match in matches:
+                    await results.put(match)  # Waits here when the consumer is behind
+            except Exception as exc:
+                await results.put(exc)
+            finally:
+                directories.task_done()
+
+    async def supervise() -> None:
+        await directories.join()
+        await results.put(finished)
+
+    try:
+        if not await loop.run_in_executor(executor, os.path.isdir, path):
+            return
+        directory_filter = await loop.run_in_executor(executor, _DirectoryFilter, path, exclude, max_depth)
+        directories.put_nowait((path, 0))
+        tasks.extend(asyncio.create_task(work()) for _ in range(concurrency))
+        tasks.append(asyncio.create_task(supervise()))
+
+        while True:
+            item = await results.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+class FileIndex:
+    """
+    A persistent index of directory listings that makes repeated scans incremental.
+
+    For every directory the index remembers its modification time and its
+    entries. A directory's mtime changes whenever an entry is added, removed
+    or renamed in it, so a directory whose mtime is unchanged is not listed
+    again: one stat call replaces the listing. Its subdirectories are still
+    visited, because a change deep in a subtree does not update the mtimes of
+    its ancestors. Subdirectories are pruned, and symlink cycles stopped, by
+    the same _DirectoryFilter as the other walkers. The index is saved as
+    zlib-compressed JSON.
+
+    Attributes:
+    -----------
+    index_path : str
+        The file the index is loaded from and saved to.
+    directories : dict[str, list]
+        For each directory, [mtime_ns, listed_at_ns, entries], where entries
+        are names, subdirectory names end with "/" and symlinked
+        subdirectory names end with "//".
+    listed : int
+        The number of directories listed by the last scan.
+    reused : int
+        The number of directories whose cached listing was reused by the last scan.
+    """
+
+    VERSION = 2
+    # Listings taken within this many nanoseconds of the directory's mtime are
+    # not trusted, since a later change could land on the same mtime tick
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Constructs all the necessary attributes for the FileIndex object and
+        loads the index file if it exists.
+
+        Parameters:
+        -----------
+        index_path : str
+            The file the index is loaded from and saved to.
+        """
+        self.index_path = index_path
+        self.directories: dict[str, list] = {}
+        self.listed = 0
+        self.reused = 0
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load the index file. A missing, corrupt or outdated file leaves the
+        index empty, so the next scan is simply a cold one.
+        """
+        try:
+            with open(self.index_path, "rb") as index_file:
+                data = json.loads(zlib.decompress(index_file.read()))
+        except (OSError, ValueError, zlib.error):
+            return
+        if data.get("version") == self.VERSION:
+            self.directories = data["directories"]
+
+    def save(self) -> None:
+        """
+        Write the index file atomically.
+        """
+        data = json.dumps({"version": self.VERSION, "directories": self.directories},
+                          separators=(",", ":")).encode()
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "wb") as index_file:
+            index_file.write(zlib.compress(data, 6))
+        os.replace(temporary_path, self.index_path)
+
+    def _entries(self, directory: str) -> list[str]:
+        """
+        Get the entries of a directory, from the index if its mtime is unchanged.
+
+        Parameters:
+        -----------
+        directory : str
+            The directory to be listed.
+
+        Returns:
+        --------
+        list[str]
+            The entry names, with subdirectory names ending in "/" ("//" for symlinks).
+        """
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self.directories.get(directory)
+        if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns > self.RACY_WINDOW_NS:
+            self.reused += 1
+            return cached[2]
+
+        entries = []
+        for entry in _scan_dir(directory):
+            if entry.is_dir():
+                entries.append(entry.name + ("//" if entry.is_symlink() else "/"))
+            elif entry.is_file():
+                entries.append(entry.name)
+        self.directories[directory] = [mtime_ns, time.time_ns(), entries]
+        self.listed += 1
+        return entries
+
+    def iter_files(self, suffix: str, path: str, exclude: Iterable[str] = (),
+                   max_depth: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield the files beneath path with file name suffix, in the same order
+        as the module-level iter_files, listing only the directories that
+        changed since the index was last updated.
+
+        Parameters:
+        -----------
+        suffix : str
+            The suffix of the files to be found.
+        path : str
+            The root directory path where the search should begin.
+        exclude : Iterable[str]
+            Glob patterns of directory names whose subtrees are never listed.
+        max_depth : Optional[int]
+            How many levels below path to descend; 0 searches path itself only.
+            Defaults to None (no limit).
+
+        Yields:
+        -------
+        str
+            The path of each file that ends with the given suffix.
+        """
+        self.listed = 0
+        self.reused = 0
+        if not os.path.isdir(path):
+            return
+
+        directory_filter = _DirectoryFilter(path, exclude, max_depth)
+        visited = {path}
+        stack = [(path, iter(self._entries(path)))]
+        while stack:
+            directory, entries = stack[-1]
+            name = next(entries, None)
+            if name is None:
+                stack.pop()
+                continue
+            if name.endswith("/"):
+                is_symlink = name.endswith("//")
+                name = name.rstrip("/")
+                subdirectory = os.path.join(directory, name)
+                if directory_filter.allows_path(subdirectory, name, len(stack), is_symlink):
+                    visited.add(subdirectory)
+                    stack.append((subdirectory, iter(self._entries(subdirectory))))
+            elif name.endswith(suffix):
+                yield os.path.join(directory, name)
+
+        # Forget directories under path that no longer exist
+        prefix = os.path.join(path, "")
+        for directory in [d for d in self.directories if d.startswith(prefix) and d not in visited]:
+            del self.directories[directory]
+
+    def find_files(self, suffix: str, path: str, exclude: Iterable[str] = (),
+                   max_depth: Optional[int] = None) -> list[str]:
+        """
+        Find all files beneath path with file name suffix, then save the updated index.
+
+        Parameters:
+        -----------
+        suffix : str
+            The suffix of the files to be found.
+        path : str
+            The root directory path where the search should begin.
+        exclude : Iterable[str]
+            Glob patterns of directory names whose subtrees are never listed.
+        max_depth : Optional[int]
+            How many levels below path to descend; 0 searches path itself only.
+            Defaults to None (no limit).
+
+        Returns:
+        --------
+        list[str]
+            A list of file paths that end with the given suffix.
+        """
+        result = list(self.iter_files(suffix, path, exclude, max_depth))
+        self.save()
+        return result
+
+def _age_tree(root: str, seconds: float) -> None:
+    """
+    Move the modification time of every directory in a tree into the past,
+    as if the tree had been created that long ago.
+
+    Parameters:
+    -----------
+    root : str
+        The root of the tree.
+    seconds : float
+        How far back to move the modification times.
+    """
+    past = time.time() - seconds
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+
+def _generate_tree(root: str, num_files: int, files_per_dir: int = 1000, dirs_per_dir: int = 32) -> None:
+    """
+    Create a directory tree of empty files for benchmarking.
+
+    Parameters:
+    -----------
+    root : str
+        The directory in which to create the tree.
+    num_files : int
+        The total number of files to create.
+    files_per_dir : int
+        The number of files in each leaf directory.
+    dirs_per_dir : int
+        The number of leaf directories grouped under each intermediate directory.
+    """
+    for leaf in range((num_files + files_per_dir - 1) // files_per_dir):
+        directory = os.path.join(root, f"group{leaf // dirs_per_dir}", f"leaf{leaf}")
+        os.makedirs(directory)
+        count = min(files_per_dir, num_files - leaf * files_per_dir)
+        for i in range(count):
+            extension = ".c" if i % 2 else ".h"
+            open(os.path.join(directory, f"file{i}{extension}"), "wb").close()
+
+def benchmark_find_files(num_files: int = 1_000_000) -> None:
+    """
+    Print the wall time and the number of Python-level filesystem calls of the
+    original listdir-based walk and the scandir-based walk on a generated tree.
+
+    Parameters:
+    -----------
+    num_files : int
+        The number of files in the generated tree.
+    """
+    import tempfile
+
+    def find_files_listdir(suffix: str, path: str) -> list[str]:
+        # The original recursive implementation, kept for comparison
+        result = []
+        if not os.path.isdir(path):
+            return result
+        for entry in os.listdir(path):
+            entry_path = os.path.join(path, entry)
+            if os.path.isdir(entry_path):
+                result.extend(find_files_listdir(suffix, entry_path))
+            elif os.path.isfile(entry_path) and entry.endswith(suffix):
+                result.append(entry_path)
+        return result
+
+    counts = {"stat": 0, "listdir": 0, "scandir": 0}
+
+    def counting(name: str, function):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Generating {num_files:,} files...")
+        _generate_tree(root, num_files)
+
+        print(f"{'walker':>10} {'seconds':>9} {'stat':>10} {'listdir':>8} {'scandir':>8} {'matches':>9}")
+        for name, walker in (("listdir", find_files_listdir), ("scandir", find_files)):
+            originals = os.stat, os.listdir, os.scandir
+            for key in counts:
+                counts[key] = 0
+            # os.path.isdir/isfile call os.stat internally, so this counts their syscalls
+            os.stat = counting("stat", os.stat)
+            os.listdir = counting("listdir", os.listdir)
+            os.scandir = counting("scandir", os.scandir)
+            try:
+                start = time.perf_counter()
+                matches = walker(".c", root)
+                elapsed = time.perf_counter() - start
+            finally:
+                os.stat, os.listdir, os.scandir = originals
+            print(f"{name:>10} {elapsed:>9.2f} {counts['stat']:>10,} {counts['listdir']:>8,} "
+                  f"{counts['scandir']:>8,} {len(matches):>9,}")
+
+def benchmark_file_index(num_files: int = 1_000_000, changed_dirs: int = 10) -> None:
+    """
+    Print the time of a cold scan, a warm scan and a scan after a few changes
+    using a FileIndex, next to a plain find_files scan.
+
+    Parameters:
+    -----------
+    num_files : int
+        The number of files in the generated tree.
+    changed_dirs : int
+        The number of directories that get a new file before the last scan.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as index_dir:
+        print(f"Generating {num_files:,} files...")
+        tree = os.path.join(root, "tree")
+        _generate_tree(tree, num_files)
+        _age_tree(tree, 60)
+        index_path = os.path.join(index_dir, "files.idx")
+
+        def timed(label: str, scan) -> None:
+            start = time.perf_counter()
+            matches = scan()
+            elapsed = time.perf_counter() - start
+            print(f"{label:>16} {elapsed:>9.2f} {len(matches):>9,}", end="")
+
+        print(f"{'scan':>16} {'seconds':>9} {'matches':>9} {'listed':>8} {'reused':>8}")
+        timed("find_files", lambda: find_files(".c", tree))
+        print()
+        for label in ("cold index", "warm index", "after changes"):
+            if label == "after changes":
+                leaves = sorted(d for d, _, files in os.walk(tree) if files)[:changed_dirs]
+                for leaf in leaves:
+                    open(os.path.join(leaf, "new.c"), "wb").close()
+            index = FileIndex(index_path)
+            timed(label, lambda: index.find_files(".c", tree))
+            print(f" {index.listed:>8,} {index.reused:>8,}")
+        print(f"index size: {os.path.getsize(index_path):,} bytes")
+
+def benchmark_parallel(latency: float = 0.005, worker_counts: tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+                       num_dirs: int = 512) -> None:
+    """
+    Print the wall time of find_files and find_files_parallel on a tree where
+    every directory listing is delayed, as on a slow network filesystem.
+
+    Parameters:
+    -----------
+    latency : float
+        The simulated delay of each directory listing in seconds.
+    worker_counts : tuple[int, ...]
+        The thread pool sizes to measure.
+    num_dirs : int
+        The approximate number of directories in the generated tree.
+    """
+    import tempfile
+
+    global _scan_dir
+    scan_dir = _scan_dir
+
+    def slow_scan_dir(path: str) -> list[os.DirEntry]:
+        time.sleep(latency)
+        return scan_dir(path)
+
+    with tempfile.TemporaryDirectory() as root:
+        _generate_tree(root, num_dirs * 10, files_per_dir=10, dirs_per_dir=16)
+        _scan_dir = slow_scan_dir
+        try:
+            start = time.perf_counter()
+            expected = sorted(find_files(".c", root))
+            sequential = time.perf_counter() - start
+            print(f"{'workers':>10} {'seconds':>9} {'speedup':>8}")
+            print(f"{'sequential':>10} {sequential:>9.2f} {1:>8.1f}")
+            for workers in worker_counts:
+                start = time.perf_counter()
+                assert find_files_parallel(".c", root, workers) == expected
+                elapsed = time.perf_counter() - start
+                print(f"{workers:>10} {elapsed:>9.2f} {sequential / elapsed:>8.1f}")
+        finally:
+            _scan_dir = scan_dir
+
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark_find_files()
+        benchmark_parallel()
+        benchmark_file_index()
+        sys.exit(0)
+
     # Test Case 1: Standard test case with known structure
     print("Test Case 1: Standard directory structure")
     result = find_files(".c", "./testdir")
@@ -59,3 +965,133 @@ if __name__ == "__main__":
     result = find_files(".java", "./testdir")
     print(result)
     # Expected output: []
+
+    # Test Case 4: A tree deeper than the recursion limit
+    print("Test Case 4: Deeper than the recursion limit")
+    import tempfile
+    with tempfile.TemporaryDirectory() as deep_root:
+        deep_path = os.path.join(deep_root, *["d"] * 300)
+        os.makedirs(deep_path)
+        open(os.path.join(deep_path, "deep.c"), "w").close()
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            result = find_files(".c", deep_root)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        print(len(result))
+        # Expected output: 1
+
+    # Test Case 5: Streaming matches one at a time
+    print("Test Case 5: Streaming generator")
+    matches = iter_files(".h", "./testdir")
+    first = next(matches)
+    print(first.endswith(".h"), sorted([first, *matches]) == sorted(find_files(".h", "./testdir")))
+    # Expected output: True True
+
+    # Test Case 6: Parallel traversal finds the same files, sorted deterministically
+    print("Test Case 6: Parallel traversal")
+    print(find_files_parallel(".c", "./testdir", workers=4) == sorted(find_files(".c", "./testdir")))
+    print(find_files_parallel(".py", "./emptydir", workers=4))
+    # Expected output: True
+    # Expected output: []
+
+    # Test Case 7: Parallel streaming on a wider tree, stopping early
+    print("Test Case 7: Parallel streaming on a generated tree")
+    with tempfile.TemporaryDirectory() as wide_root:
+        _generate_tree(wide_root, 2000, files_per_dir=20, dirs_per_dir=8)
+        streamed = set(iter_files_parallel(".h", wide_root, workers=8))
+        print(len(streamed), streamed == set(find_files(".h", wide_root)))
+        first_match = next(iter_files_parallel(".h", wide_root, workers=8))
+        print(first_match.endswith(".h"))
+    # Expected output: 1000 True
+    # Expected output: True
+
+    # Test Case 8: Several suffixes and globs grouped from one walk
+    print("Test Case 8: Multiple patterns in a single pass")
+    groups = find_files_multi([".c", ".h", "a.*", "t?.c", ".java"], "./testdir")
+    print(groups[".c"] == find_files(".c", "./testdir"), groups[".h"] == find_files(".h", "./testdir"))
+    print(sorted(groups["a.*"]))
+    print(groups["t?.c"], groups[".java"])
+    # Expected output: True True
+    # Expected output: ['./testdir/subdir1/a.c', './testdir/subdir1/a.h', './testdir/subdir5/a.c', './testdir/subdir5/a.h']
+    # Expected output: ['./testdir/t1.c'] []
+
+    # Test Case 9: Overlapping suffixes all match
+    print("Test Case 9: Overlapping suffixes")
+    print(PatternMatcher([".gz", ".tar.gz", "gz", "*.tar.*"]).match("backup.tar.gz"))
+    # Expected output: ['gz', '.gz', '.tar.gz', '*.tar.*']
+
+    # Test Case 10: A warm index re-lists only the directories that changed
+    print("Test Case 10: Incremental re-scan index")
+    with tempfile.TemporaryDirectory() as index_root:
+        tree = os.path.join(index_root, "tree")
+        _generate_tree(tree, 200, files_per_dir=10, dirs_per_dir=5)
+        _age_tree(tree, 60)
+        index_path = os.path.join(index_root, "files.idx")
+        cold = FileIndex(index_path)
+        print(cold.find_files(".c", tree) == find_files(".c", tree), cold.listed, cold.reused)
+        changed = os.path.join(tree, "group0", "leaf0")
+        open(os.path.join(changed, "new.c"), "w").close()
+        warm = FileIndex(index_path)
+        print(warm.find_files(".c", tree) == find_files(".c", tree), warm.listed, warm.reused)
+    # Expected output: True 25 0
+    # Expected output: True 1 24
+
+    # Test Case 11: Excluded directories, depth limits and symlink loops
+    print("Test Case 11: Pruning, depth limits and symlink cycles")
+    with tempfile.TemporaryDirectory() as pruned_root:
+        os.makedirs(os.path.join(pruned_root, "src", "deep"))
+        os.makedirs(os.path.join(pruned_root, ".git", "objects"))
+        for relative in ("top.c", "src/mid.c", "src/deep/low.c", ".git/objects/junk.c"):
+            open(os.path.join(pruned_root, relative), "w").close()
+        os.symlink(pruned_root, os.path.join(pruned_root, "src", "loop"))  # Points back at the root
+
+        def relative(paths):
+            return sorted(os.path.relpath(p, pruned_root) for p in paths)
+
+        print(relative(find_files(".c", pruned_root, exclude=[".git"])))
+        print(relative(find_files(".c", pruned_root, exclude=[".*"], max_depth=1)))
+        print(relative(find_files_parallel(".c", pruned_root, exclude=[".git"])) ==
+              relative(find_files(".c", pruned_root, exclude=[".git"])))
+        pruned_index = FileIndex(os.path.join(pruned_root, ".git", "index.json.z"))
+        print(relative(pruned_index.find_files(".c", pruned_root, exclude=[".git"])))
+        print(relative(pruned_index.find_files(".c", pruned_root, exclude=[".*"], max_depth=1)))
+    # Expected output: ['src/deep/low.c', 'src/mid.c', 'top.c']
+    # Expected output: ['src/mid.c', 'top.c']
+    # Expected output: True
+    # Expected output: ['src/deep/low.c', 'src/mid.c', 'top.c']
+    # Expected output: ['src/mid.c', 'top.c']
+
+    # Test Case 12: Async traversal keeps the event loop responsive and stops early on request
+    print("Test Case 12: asyncio front-end")
+
+    async def async_checks(root: str) -> None:
+        ticks = 0
+        stop_ticking = asyncio.Event()
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while not stop_ticking.is_set():
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticking = asyncio.create_task(ticker())
+        found = [path async for path in afind_files(".c", root, concurrency=4, max_pending=8)]
+        stop_ticking.set()
+        await ticking
+        print(sorted(found) == sorted(find_files(".c", root)), ticks > 0)
+
+        matches = afind_files(".c", root)
+        first = await matches.__anext__()
+        await matches.aclose()  # Stops the walk
+        print(first.endswith(".c"))
+
+        print([path async for path in afind_files(".c", "./emptydir")])
+
+    with tempfile.TemporaryDirectory() as async_root:
+        _generate_tree(async_root, 1000, files_per_dir=10, dirs_per_dir=10)
+        asyncio.run(async_checks(async_root))
+    # Expected output: True True
+    # Expected output: True
+    # Expected output: []
@@ -1,6 +1,28 @@
 import heapq
-from collections import defaultdict
-from typing import Optional
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, BinaryIO, Optional, Union
+
+# Number of symbols (or packed bytes) converted at a time by the bit-packing helpers
+_CHUNK_SIZE = 1 << 16
+
+# Largest alphabet decoded with the transition table, which has 256 entries
+# per internal node; larger alphabets use the tree walk
+_MAX_TABLE_SYMBOLS = 256
+
+# Magic number and data kinds of the self-describing format
+_MAGIC = b'HUF'
+_STREAM_MAGIC = b'HUFS'
+_PARALLEL_MAGIC = b'HUFP'
+_KIND_TEXT = 0
+_KIND_BYTES = 1
 
 # Huffman Tree Node
 class HuffmanNode:
@@ -144,22 +166,128 @@ def huffman_encoding(data: str) -> tuple[Optional[str], Optional[HuffmanNode]]:
 
     frequency = calculate_frequencies(data)
 
+    huffman_codes, tree = _build_codes(frequency)
+
+    encoded_data = ''.join(huffman_codes[char] for char in data)
+
+    return encoded_data, tree
+
+def _build_codes(frequency: dict[str, int]) -> tuple[dict[str, str], HuffmanNode]:
+    """
+    Build the Huffman tree and the code of every character for the given frequencies.
+
+    Parameters:
+    -----------
+    frequency : Dict[str, int]
+        A dictionary with characters as keys and their frequencies as values.
+
+    Returns:
+    --------
+    Tuple[Dict[str, str], HuffmanNode]
+        The code of each character and the root of the Huffman Tree.
+    """
     # Handle single unique character case
     if len(frequency) == 1:
         single_char = next(iter(frequency))
-        huffman_codes = {single_char: '0'}
-        encoded_data = '0' * len(data)
-        return encoded_data, HuffmanNode(single_char, frequency[single_char])
+        return {single_char: '0'}, HuffmanNode(single_char, frequency[single_char])
 
     # Build Huffman tree for other cases
     tree = build_huffman_tree(frequency)
 
     huffman_codes = {}
     generate_huffman_codes(tree, '', huffman_codes)
+    return huffman_codes, tree
 
-    encoded_data = ''.join(huffman_codes[char] for char in data)
+def _pack_bits(data: Sequence, codes: Any) -> tuple[bytes, int]:
+    """
+    Encode symbols and pack their codes into bytes, most significant bit first.
 
-    return encoded_data, tree
+    The symbols are converted a chunk at a time, so the temporary '0'/'1'
+    string never holds more than one chunk's worth of codes.
+
+    Parameters:
+    -----------
+    data : Sequence
+        The symbols to be encoded (a string, or any sliceable sequence).
+    codes : Any
+        A mapping (or list) from each symbol to its code as a '0'/'1' string.
+
+    Returns:
+    --------
+    Tuple[bytes, int]
+        The packed bits, padded with zeros to a whole byte, and the number of meaningful bits.
+    """
+    packed = bytearray()
+    lookup = codes.__getitem__
+    pending = ''
+    bit_length = 0
+
+    for start in range(0, len(data), _CHUNK_SIZE):
+        bits = ''.join(map(lookup, data[start:start + _CHUNK_SIZE]))
+        bit_length += len(bits)
+        bits = pending + bits
+
+        # Pack the whole bytes now and carry the remaining bits over
+        whole = len(bits) - len(bits) % 8
+        if whole:
+            packed += int(bits[:whole], 2).to_bytes(whole // 8, 'big')
+        pending = bits[whole:]
+
+    if pending:
+        packed += int(pending.ljust(8, '0'), 2).to_bytes(1, 'big')
+    return bytes(packed), bit_length
+
+def _unpack_bits(packed: Sequence[int], bit_length: int) -> Iterator[str]:
+    """
+    Unpack bytes into '0'/'1' strings, a chunk at a time.
+
+    Parameters:
+    -----------
+    packed : Sequence[int]
+        The packed bits (bytes, bytearray or memoryview).
+    bit_length : int
+        The number of meaningful bits; the padding after them is dropped.
+
+    Yields:
+    -------
+    str
+        Consecutive pieces of the bit string.
+    """
+    remaining = bit_length
+    for start in range(0, (bit_length + 7) // 8, _CHUNK_SIZE):
+        chunk = packed[start:start + _CHUNK_SIZE]
+        bits = bin(int.from_bytes(chunk, 'big'))[2:].zfill(len(chunk) * 8)
+        yield bits[:remaining]
+        remaining -= len(bits)
+
+def huffman_encoding_packed(data: str) -> tuple[Optional[bytes], int, Optional[HuffmanNode]]:
+    """
+    Encode the given data using Huffman coding, packing eight bits per byte.
+
+    Unlike huffman_encoding, whose '0'/'1' string takes a whole character per
+    bit, the output size here reflects the actual compression.
+
+    Parameters:
+    -----------
+    data : str
+        The input string to be encoded.
+
+    Returns:
+    --------
+    Tuple[Optional[bytes], int, Optional[HuffmanNode]]
+        The packed encoded bits, the number of meaningful bits in them, and
+        the root of the Huffman Tree.
+    """
+    # Validate input
+    if not isinstance(data, str):
+        raise ValueError("Input data must be a string.")
+    if not data:
+        print("No data to encode!")
+        return None, 0, None
+
+    huffman_codes, tree = _build_codes(calculate_frequencies(data))
+    packed, bit_length = _pack_bits(data, huffman_codes)
+    return packed, bit_length, tree
 
 def huffman_decoding(encoded_data: Optional[str], tree: Optional[HuffmanNode]) -> str:
     """
@@ -202,6 +330,1311 @@ def huffman_decoding(encoded_data: Optional[str], tree: Optional[HuffmanNode]) -
     return decoded_text
 
 
+def huffman_decoding_packed(packed: Optional[bytes], bit_length: int, tree: Optional[HuffmanNode]) -> str:
+    """
+    Decode packed bits produced by huffman_encoding_packed using the Huffman Tree.
+
+    Parameters:
+    -----------
+    packed : Optional[bytes]
+        The packed encoded bits.
+    bit_length : int
+        The number of meaningful bits in packed.
+    tree : Optional[HuffmanNode]
+        The root of the Huffman Tree used for decoding.
+
+    Returns:
+    --------
+    str
+        The decoded string.
+    """
+    # Validate input
+    if not packed or not tree:
+        print("No encoded data or Huffman tree provided!")
+        return ""
+
+    # Special case: single character encoding
+    if tree.char is not None:
+        return tree.char * bit_length
+
+    decoded_chars = []
+    current_node = tree
+
+    for bits in _unpack_bits(packed, bit_length):
+        for bit in bits:
+            if bit == '0':
+                current_node = current_node.left
+            else:
+                current_node = current_node.right
+
+            if current_node.char is not None:
+                decoded_chars.append(current_node.char)
+                current_node = tree
+
+    return ''.join(decoded_chars)
+
+def _build_decode_table(codes: Any, run_type: type) -> tuple[list, list]:
+    """
+    Build the transition table of the table-driven decoder.
+
+    The decoder is a finite-state machine that consumes one byte (eight
+    bits) per step. Its states are the proper prefixes of the codes, that
+    is the internal nodes of the Huffman Tree, with the empty prefix as the
+    start state. Entry state * 256 + byte holds the run of symbols completed
+    while reading that byte from that state, and the state reached after it.
+    Bit sequences that are no code prefix get None in both tables.
+
+    Parameters:
+    -----------
+    codes : Any
+        A mapping from each symbol to its code as a '0'/'1' string.
+    run_type : type
+        The type of the runs of symbols (str, or bytes for byte symbols).
+
+    Returns:
+    --------
+    Tuple[list, list]
+        The run of each entry, and the next state of each entry multiplied by 256.
+    """
+    make_run = ''.join if run_type is str else bytes
+    decode = {code: symbol for symbol, code in codes.items()}
+    states = {}
+    for code in codes.values():
+        for length in range(len(code)):
+            states.setdefault(code[:length], len(states) * 256)
+
+    # Walk four bits from each state first, then combine two nibbles per byte
+    nibbles = {}
+    for prefix in states:
+        for nibble in range(16):
+            emitted = []
+            current = prefix
+            for bit in format(nibble, '04b'):
+                current += bit
+                if current in decode:
+                    emitted.append(decode[current])
+                    current = ''
+                elif current not in states:
+                    current = None
+                    break
+            nibbles[prefix, nibble] = emitted, current
+
+    runs = [None] * (len(states) * 256)
+    transitions = [None] * (len(states) * 256)
+    for prefix, state in states.items():
+        for high in range(16):
+            high_emitted, middle = nibbles[prefix, high]
+            if middle is None:
+                continue
+            for low in range(16):
+                low_emitted, current = nibbles[middle, low]
+                if current is None:
+                    continue
+                runs[state | high << 4 | low] = make_run(high_emitted + low_emitted)
+                transitions[state | high << 4 | low] = states[current]
+
+    return runs, transitions
+
+def _table_decode(packed: Sequence[int], bit_length: int, table: tuple[list, list], count: int, run_type: type) -> Any:
+    """
+    Decode packed bits a whole byte per step with a transition table.
+
+    Each step is one table lookup that yields every symbol completed in the
+    next eight bits, however many codes that spans. The runs are written
+    into a list preallocated with one slot per input byte and joined once.
+
+    Parameters:
+    -----------
+    packed : Sequence[int]
+        The packed encoded bits.
+    bit_length : int
+        The number of meaningful bits in packed.
+    table : Tuple[list, list]
+        The runs and transitions built by _build_decode_table.
+    count : int
+        The number of encoded symbols; symbols decoded from the padding are dropped.
+    run_type : type
+        The type of the result (str, or bytes for byte symbols).
+
+    Returns:
+    --------
+    Any
+        The decoded symbols, as a run_type.
+    """
+    runs, transitions = table
+    pieces = [None] * ((bit_length + 7) // 8)
+    state = 0
+
+    try:
+        for index, byte in enumerate(packed[:len(pieces)]):
+            entry = state | byte
+            pieces[index] = runs[entry]
+            state = transitions[entry]
+        decoded = run_type().join(pieces)
+    except TypeError:
+        # A None run or state: the bits are no valid code
+        raise ValueError("Invalid Huffman code in input.") from None
+
+    if len(decoded) < count:
+        raise ValueError("Encoded data ended in the middle of a code.")
+    return decoded[:count] if len(decoded) > count else decoded
+
+def _build_decode_tree(codes: Any) -> tuple[list, list, list]:
+    """
+    Build the code tree of the tree-walk decoder, kept in lists.
+
+    The children of internal node i are left[i] and right[i]: another node,
+    ~index of a symbol, or None where no code continues. Building it is
+    linear in the total length of the codes.
+
+    Parameters:
+    -----------
+    codes : Any
+        A mapping from each symbol to its code as a '0'/'1' string.
+
+    Returns:
+    --------
+    Tuple[list, list, list]
+        The symbols, and the left and right children of each internal node.
+    """
+    symbols = list(codes)
+    left = [None]
+    right = [None]
+    for index, symbol in enumerate(symbols):
+        node = 0
+        code = codes[symbol]
+        for bit in code[:-1]:
+            children = right if bit == '1' else left
+            if children[node] is None:
+                children[node] = len(left)
+                left.append(None)
+                right.append(None)
+            node = children[node]
+        (right if code[-1] == '1' else left)[node] = ~index
+    return symbols, left, right
+
+def _tree_decode(packed: Sequence[int], bit_length: int, tree: tuple[list, list, list], count: int,
+                 run_type: type) -> Any:
+    """
+    Decode packed bits one bit at a time, walking a code tree.
+
+    This is the fallback for alphabets too large for the transition table.
+
+    Parameters:
+    -----------
+    packed : Sequence[int]
+        The packed encoded bits.
+    bit_length : int
+        The number of meaningful bits in packed.
+    tree : Tuple[list, list, list]
+        The symbols and children built by _build_decode_tree.
+    count : int
+        The number of encoded symbols.
+    run_type : type
+        The type of the result (str, or bytes for byte symbols).
+
+    Returns:
+    --------
+    Any
+        The decoded symbols, as a run_type.
+    """
+    symbols, left, right = tree
+    decoded = []
+    node = 0
+    try:
+        for bits in _unpack_bits(packed, bit_length):
+            for bit in bits:
+                node = right[node] if bit == '1' else left[node]
+                if node < 0:
+                    decoded.append(symbols[~node])
+                    node = 0
+    except TypeError:
+        # A None child: the bits are no valid code
+        raise ValueError("Invalid Huffman code in input.") from None
+
+    if len(decoded) < count:
+        raise ValueError("Encoded data ended in the middle of a code.")
+    del decoded[count:]
+    return ''.join(decoded) if run_type is str else bytes(decoded)
+
+def _make_decoder(codes: Any, run_type: type) -> Callable[[Sequence[int], int, int], Any]:
+    """
+    Build a decoder for the given codes, to be reused for every block encoded with them.
+
+    It uses the transition table, or the tree walk when the alphabet is too
+    large for the table to pay off.
+
+    Parameters:
+    -----------
+    codes : Any
+        A mapping from each symbol to its code as a '0'/'1' string.
+    run_type : type
+        The type of the decoded data (str, or bytes for byte symbols).
+
+    Returns:
+    --------
+    Callable[[Sequence[int], int, int], Any]
+        A function taking the packed bits, their bit length and the number of
+        encoded symbols, and returning the decoded symbols as a run_type.
+    """
+    if len(codes) > _MAX_TABLE_SYMBOLS:
+        tree = _build_decode_tree(codes)
+        return lambda packed, bit_length, count: _tree_decode(packed, bit_length, tree, count, run_type)
+    table = _build_decode_table(codes, run_type)
+    return lambda packed, bit_length, count: _table_decode(packed, bit_length, table, count, run_type)
+
+def huffman_decoding_fast(packed: Optional[bytes], bit_length: int, tree: Optional[HuffmanNode]) -> str:
+    """
+    Decode packed bits produced by huffman_encoding_packed with lookup tables.
+
+    A whole byte of input is resolved per table lookup instead of one tree
+    node per bit (alphabets of more than 256 characters fall back to a tree
+    walk). The number of encoded characters, which is the frequency of the
+    root, tells where the padding starts.
+
+    Parameters:
+    -----------
+    packed : Optional[bytes]
+        The packed encoded bits.
+    bit_length : int
+        The number of meaningful bits in packed.
+    tree : Optional[HuffmanNode]
+        The root of the Huffman Tree used for encoding.
+
+    Returns:
+    --------
+    str
+        The decoded string.
+    """
+    # Validate input
+    if not packed or not tree:
+        print("No encoded data or Huffman tree provided!")
+        return ""
+
+    if tree.char is not None:
+        huffman_codes = {tree.char: '0'}
+    else:
+        huffman_codes = {}
+        generate_huffman_codes(tree, '', huffman_codes)
+
+    return _make_decoder(huffman_codes, str)(packed, bit_length, tree.freq)
+
+def code_lengths_from_tree(tree: HuffmanNode) -> dict[str, int]:
+    """
+    Collect the code length (the depth) of every character in the Huffman Tree.
+
+    The tree is walked with an explicit stack, so deep trees cannot hit the
+    recursion limit. A tree with a single character gets a length of 1.
+
+    Parameters:
+    -----------
+    tree : HuffmanNode
+        The root of the Huffman Tree.
+
+    Returns:
+    --------
+    Dict[str, int]
+        A dictionary with characters as keys and their code lengths as values.
+    """
+    if tree.char is not None:
+        return {tree.char: 1}
+
+    lengths = {}
+    stack = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if node.char is not None:
+            lengths[node.char] = depth
+        else:
+            stack.append((node.right, depth + 1))
+            stack.append((node.left, depth + 1))
+    return lengths
+
+def _symbol_value(symbol: Any) -> int:
+    """
+    Return the number that orders and serializes a symbol: the code point of
+    a character, or the value of a byte.
+    """
+    return ord(symbol) if isinstance(symbol, str) else symbol
+
+def canonical_codes(lengths: dict[Any, int]) -> dict[Any, str]:
+    """
+    Assign canonical Huffman codes from code lengths.
+
+    Symbols are sorted by code length, then by value, and each gets the
+    previous code plus one, shifted left whenever the length grows. The
+    lengths alone therefore determine every code, so they are all a decoder
+    needs to rebuild the table.
+
+    Parameters:
+    -----------
+    lengths : Dict[Any, int]
+        A dictionary with symbols as keys and their code lengths as values.
+
+    Returns:
+    --------
+    Dict[Any, str]
+        A dictionary with symbols as keys and their codes as '0'/'1' strings as values.
+    """
+    codes = {}
+    code = 0
+    previous_length = 0
+    for symbol in sorted(lengths, key=lambda symbol: (lengths[symbol], _symbol_value(symbol))):
+        length = lengths[symbol]
+        code <<= length - previous_length
+        codes[symbol] = format(code, f'0{length}b')
+        code += 1
+        previous_length = length
+    return codes
+
+def _moffat_katajainen(weights: list[int]) -> None:
+    """
+    Turn weights sorted in increasing order into optimal code lengths, in place.
+
+    This is the in-place algorithm of Moffat and Katajainen. The first pass
+    merges like the two-queue method, with the leaves read from the front
+    and the internal nodes stored behind them as parent pointers. The second
+    pass turns parent pointers into depths, and the third turns the depths
+    of internal nodes into the depths of the leaves. It runs in O(n) time,
+    with no objects, heap or recursion.
+
+    Parameters:
+    -----------
+    weights : List[int]
+        At least two weights in increasing order, replaced by their code lengths.
+    """
+    n = len(weights)
+
+    # Phase 1: build the tree, each internal node replacing a consumed slot
+    weights[0] += weights[1]
+    root = 0
+    leaf = 2
+    for next_node in range(1, n - 1):
+        if leaf >= n or weights[root] < weights[leaf]:
+            weights[next_node] = weights[root]
+            weights[root] = next_node
+            root += 1
+        else:
+            weights[next_node] = weights[leaf]
+            leaf += 1
+        if leaf >= n or (root < next_node and weights[root] < weights[leaf]):
+            weights[next_node] += weights[root]
+            weights[root] = next_node
+            root += 1
+        else:
+            weights[next_node] += weights[leaf]
+            leaf += 1
+
+    # Phase 2: parent pointers to internal node depths
+    weights[n - 2] = 0
+    for next_node in range(n - 3, -1, -1):
+        weights[next_node] = weights[weights[next_node]] + 1
+
+    # Phase 3: internal node depths to leaf depths
+    available = 1
+    used = 0
+    depth = 0
+    root = n - 2
+    next_node = n - 1
+    while available > 0:
+        while root >= 0 and weights[root] == depth:
+            used += 1
+            root -= 1
+        while available > used:
+            weights[next_node] = depth
+            next_node -= 1
+            available -= 1
+        available = 2 * used
+        depth += 1
+        used = 0
+
+def _package_merge(weights: list[int], max_length: int) -> list[int]:
+    """
+    Compute optimal code lengths of at most max_length bits with package-merge.
+
+    Each round pairs up the cheapest items of the previous list into
+    packages and merges them with the leaves. After max_length - 1 rounds,
+    the 2n - 2 cheapest items are selected, and the length of each symbol
+    is the number of times its leaf occurs in them.
+
+    Parameters:
+    -----------
+    weights : List[int]
+        At least two weights in increasing order.
+    max_length : int
+        The maximum code length.
+
+    Returns:
+    --------
+    List[int]
+        The code length of each weight.
+    """
+    n = len(weights)
+    # An item is (weight, symbol index, first part, second part); packages have index -1
+    leaves = [(weight, index, None, None) for index, weight in enumerate(weights)]
+    items = leaves
+    for _ in range(max_length - 1):
+        packages = [(first[0] + second[0], -1, first, second) for first, second in zip(items[0::2], items[1::2])]
+        items = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+
+    lengths = [0] * n
+    stack = items[:2 * n - 2]
+    while stack:
+        _, index, first, second = stack.pop()
+        if index >= 0:
+            lengths[index] += 1
+        else:
+            stack.append(first)
+            stack.append(second)
+    return lengths
+
+def huffman_code_lengths(frequency: dict[Any, int], max_length: Optional[int] = None) -> dict[Any, int]:
+    """
+    Compute optimal code lengths for the given frequencies, without building a tree.
+
+    The frequencies are sorted once and turned into lengths in place by
+    _moffat_katajainen. When max_length is given and the optimal code is
+    longer, package-merge finds the best code within the limit instead,
+    so that the codes fit fixed-size decoding tables.
+
+    Parameters:
+    -----------
+    frequency : Dict[Any, int]
+        A dictionary with symbols as keys and their frequencies as values.
+    max_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    Dict[Any, int]
+        A dictionary with symbols as keys and their code lengths as values.
+    """
+    if max_length is not None and (1 << max_length) < len(frequency):
+        raise ValueError(f"{len(frequency)} symbols do not fit in codes of {max_length} bits.")
+
+    symbols = sorted(frequency, key=lambda symbol: (frequency[symbol], _symbol_value(symbol)))
+    if len(symbols) <= 1:
+        return {symbol: 1 for symbol in symbols}
+
+    weights = [frequency[symbol] for symbol in symbols]
+    lengths = weights.copy()
+    _moffat_katajainen(lengths)
+    # The longest codes belong to the rarest symbols, at the front
+    if max_length is not None and lengths[0] > max_length:
+        lengths = _package_merge(weights, max_length)
+    return dict(zip(symbols, lengths))
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """
+    Append a non-negative integer as a LEB128 varint: seven bits per byte,
+    least significant group first, with the high bit set on all but the last byte.
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: Sequence[int], offset: int) -> tuple[int, int]:
+    """
+    Read a LEB128 varint written by _write_varint.
+
+    Returns:
+    --------
+    Tuple[int, int]
+        The value and the offset just past it.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated Huffman header.")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def serialize_code_lengths(lengths: dict[Any, int]) -> bytes:
+    """
+    Serialize code lengths into a compact header.
+
+    The header is the number of symbols followed, in increasing symbol
+    order, by each symbol value as the difference from the previous one and
+    its code length, all as varints. A typical text alphabet takes about
+    two bytes per symbol.
+
+    Parameters:
+    -----------
+    lengths : Dict[Any, int]
+        A dictionary with symbols as keys and their code lengths as values.
+
+    Returns:
+    --------
+    bytes
+        The serialized header.
+    """
+    header = bytearray()
+    _write_varint(header, len(lengths))
+    previous = 0
+    for value, length in sorted((_symbol_value(symbol), length) for symbol, length in lengths.items()):
+        _write_varint(header, value - previous)
+        _write_varint(header, length)
+        previous = value
+    return bytes(header)
+
+def deserialize_code_lengths(data: Sequence[int], offset: int = 0, text: bool = True) -> tuple[dict[Any, int], int]:
+    """
+    Read code lengths written by serialize_code_lengths.
+
+    Parameters:
+    -----------
+    data : Sequence[int]
+        The buffer holding the header.
+    offset : int
+        The position of the header in data.
+    text : bool
+        Whether the symbols are characters (True) or byte values (False).
+
+    Returns:
+    --------
+    Tuple[Dict[Any, int], int]
+        The code lengths and the offset just past the header.
+    """
+    count, offset = _read_varint(data, offset)
+    lengths = {}
+    value = 0
+    for _ in range(count):
+        delta, offset = _read_varint(data, offset)
+        length, offset = _read_varint(data, offset)
+        value += delta
+        lengths[chr(value) if text else value] = length
+    return lengths, offset
+
+def huffman_compress(data: str, max_code_length: Optional[int] = None) -> bytes:
+    """
+    Encode the given data into a self-describing byte string.
+
+    The result holds a magic number, the number of characters, the number
+    of encoded bits, the code lengths and the packed bits of the canonical
+    codes. It can be stored or sent to another process and decoded with
+    huffman_decompress, without the Huffman Tree.
+
+    Parameters:
+    -----------
+    data : str
+        The input string to be encoded.
+    max_code_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    bytes
+        The encoded data.
+    """
+    # Validate input
+    if not isinstance(data, str):
+        raise ValueError("Input data must be a string.")
+
+    return _compress(data, _KIND_TEXT, Counter(data), canonical_codes, max_code_length)
+
+def byte_frequencies(data: Any) -> list[int]:
+    """
+    Count the occurrences of each byte value in a bytes-like object.
+
+    Parameters:
+    -----------
+    data : Any
+        A bytes-like object: bytes, bytearray, memoryview, mmap, array...
+
+    Returns:
+    --------
+    List[int]
+        A list of 256 counts, indexed by byte value.
+    """
+    frequencies = [0] * 256
+    for value, count in Counter(memoryview(data).cast('B')).items():
+        frequencies[value] = count
+    return frequencies
+
+def huffman_compress_bytes(data: Any, max_code_length: Optional[int] = None) -> bytes:
+    """
+    Encode a bytes-like object into a self-describing byte string.
+
+    The input is read through a memoryview, so bytearrays, memoryviews and
+    memory-mapped files are encoded in place, without first being copied
+    or decoded to text. Frequencies and codes are kept in 256-entry lists
+    indexed by byte value. huffman_decompress returns the data as bytes.
+
+    Parameters:
+    -----------
+    data : Any
+        A bytes-like object: bytes, bytearray, memoryview, mmap, array...
+    max_code_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    bytes
+        The encoded data.
+    """
+    view = memoryview(data).cast('B')
+    frequencies = byte_frequencies(view)
+    frequency = {value: count for value, count in enumerate(frequencies) if count}
+
+    def code_table(lengths: dict[int, int]) -> list[Optional[str]]:
+        table = [None] * 256
+        for value, code in canonical_codes(lengths).items():
+            table[value] = code
+        return table
+
+    return _compress(view, _KIND_BYTES, frequency, code_table, max_code_length)
+
+def _compress(data: Sequence, kind: int, frequency: dict[Any, int], code_table: Any,
+              max_code_length: Optional[int]) -> bytes:
+    """
+    Write the self-describing format shared by huffman_compress and huffman_compress_bytes.
+
+    Parameters:
+    -----------
+    data : Sequence
+        The symbols to be encoded.
+    kind : int
+        _KIND_TEXT or _KIND_BYTES.
+    frequency : Dict[Any, int]
+        A dictionary with symbols as keys and their frequencies as values.
+    code_table : Any
+        A function turning code lengths into a lookup from symbol to code.
+    max_code_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    bytes
+        The encoded data.
+    """
+    out = bytearray(_MAGIC)
+    out.append(kind)
+    if not data:
+        _write_varint(out, 0)
+        return bytes(out)
+
+    lengths = huffman_code_lengths(frequency, max_code_length)
+    packed, bit_length = _pack_bits(data, code_table(lengths))
+
+    _write_varint(out, len(data))
+    _write_varint(out, bit_length)
+    out += serialize_code_lengths(lengths)
+    out += packed
+    return bytes(out)
+
+def huffman_decompress(blob: bytes) -> Union[str, bytes]:
+    """
+    Decode a byte string produced by huffman_compress or huffman_compress_bytes.
+
+    Parameters:
+    -----------
+    blob : bytes
+        The encoded data (any bytes-like object).
+
+    Returns:
+    --------
+    Union[str, bytes]
+        The decoded string, or the decoded bytes for data from huffman_compress_bytes.
+    """
+    view = memoryview(blob)
+    if bytes(view[:len(_MAGIC)]) != _MAGIC or len(view) <= len(_MAGIC):
+        raise ValueError("Not Huffman-encoded data.")
+    kind = view[len(_MAGIC)]
+    if kind not in (_KIND_TEXT, _KIND_BYTES):
+        raise ValueError(f"Unknown Huffman data kind: {kind}")
+    text = kind == _KIND_TEXT
+    run_type = str if text else bytes
+
+    count, offset = _read_varint(view, len(_MAGIC) + 1)
+    if not count:
+        return run_type()
+    bit_length, offset = _read_varint(view, offset)
+    lengths, offset = deserialize_code_lengths(view, offset, text=text)
+    return _make_decoder(canonical_codes(lengths), run_type)(view[offset:], bit_length, count)
+
+def _read_stream_varint(stream: BinaryIO) -> int:
+    """
+    Read a varint written by _write_varint from a binary stream.
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError("Truncated Huffman stream.")
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """
+    Read exactly size bytes from a binary stream.
+    """
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated Huffman stream.")
+    return data
+
+def _write_table(dst: BinaryIO, lengths: dict[Any, int]) -> None:
+    """
+    Write serialized code lengths to a stream, prefixed with their size.
+    """
+    header = bytearray()
+    table = serialize_code_lengths(lengths)
+    _write_varint(header, len(table))
+    dst.write(header)
+    dst.write(table)
+
+def huffman_compress_stream(src: IO, dst: BinaryIO, block_size: int = 1 << 20, shared_table: bool = True,
+                            max_code_length: Optional[int] = None) -> int:
+    """
+    Encode a file-like object into a binary stream, one block at a time.
+
+    src may be opened in text mode (characters are encoded) or in binary
+    mode (bytes are encoded). It is read in blocks of block_size characters
+    or bytes, and each block is encoded and written before the next is
+    read, so memory stays bounded by the block size.
+
+    With shared_table, a first pass counts the frequencies of the whole
+    input and one code table is written up front. This needs a seekable
+    src; otherwise every block carries its own table, which also adapts
+    to inputs whose character mix changes along the way.
+
+    Parameters:
+    -----------
+    src : IO
+        The input, in text or binary mode.
+    dst : BinaryIO
+        The binary output stream.
+    block_size : int
+        The number of characters (or bytes) encoded per block.
+    shared_table : bool
+        Whether to use one table for all blocks when src is seekable.
+    max_code_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    int
+        The number of characters (or bytes) encoded.
+    """
+    if block_size <= 0:
+        raise ValueError("Block size must be positive.")
+
+    first = src.read(block_size)
+    text = isinstance(first, str)
+
+    lengths = None
+    if shared_table and src.seekable():
+        # First pass: count the whole input, then rewind to just after the first block
+        frequency = Counter(first)
+        resume = src.tell()
+        for block in iter(lambda: src.read(block_size), first[:0]):
+            frequency.update(block)
+        src.seek(resume)
+        if frequency:
+            lengths = huffman_code_lengths(frequency, max_code_length)
+
+    dst.write(_STREAM_MAGIC)
+    dst.write(bytes((_KIND_TEXT if text else _KIND_BYTES, lengths is not None)))
+    if lengths is not None:
+        _write_table(dst, lengths)
+        codes = canonical_codes(lengths)
+
+    total = 0
+    block = first
+    while block:
+        header = bytearray()
+        if lengths is None:
+            block_lengths = huffman_code_lengths(Counter(block), max_code_length)
+            packed, bit_length = _pack_bits(block, canonical_codes(block_lengths))
+        else:
+            packed, bit_length = _pack_bits(block, codes)
+        _write_varint(header, len(block))
+        _write_varint(header, bit_length)
+        dst.write(header)
+        if lengths is None:
+            _write_table(dst, block_lengths)
+        dst.write(packed)
+
+        total += len(block)
+        block = src.read(block_size)
+
+    # A block of zero symbols marks the end of the stream
+    dst.write(b'\x00')
+    return total
+
+def huffman_decompress_stream(src: BinaryIO, dst: IO) -> int:
+    """
+    Decode a binary stream produced by huffman_compress_stream, one block at a time.
+
+    Parameters:
+    -----------
+    src : BinaryIO
+        The encoded binary input stream.
+    dst : IO
+        The output, in text mode for encoded text or binary mode for encoded bytes.
+
+    Returns:
+    --------
+    int
+        The number of characters (or bytes) decoded.
+    """
+    if src.read(len(_STREAM_MAGIC)) != _STREAM_MAGIC:
+        raise ValueError("Not a Huffman stream.")
+    kind, shared = _read_exactly(src, 2)
+    if kind not in (_KIND_TEXT, _KIND_BYTES):
+        raise ValueError(f"Unknown Huffman data kind: {kind}")
+    text = kind == _KIND_TEXT
+    run_type = str if text else bytes
+
+    def read_decoder() -> Callable[[Sequence[int], int, int], Any]:
+        table = _read_exactly(src, _read_stream_varint(src))
+        return _make_decoder(canonical_codes(deserialize_code_lengths(table, text=text)[0]), run_type)
+
+    # A shared table is turned into a decoder once, for all blocks
+    if shared:
+        decoder = read_decoder()
+
+    total = 0
+    while True:
+        count = _read_stream_varint(src)
+        if not count:
+            return total
+        bit_length = _read_stream_varint(src)
+        if not shared:
+            decoder = read_decoder()
+        packed = _read_exactly(src, (bit_length + 7) // 8)
+        dst.write(decoder(packed, bit_length, count))
+        total += count
+
+def _encode_block(block: bytes, table: list[Optional[str]]) -> tuple[bytes, int]:
+    """
+    Encode one block in a worker process.
+    """
+    return _pack_bits(block, table)
+
+# The decoder of a pool worker process, built once by _init_block_decoder
+_block_decoder = None
+
+def _init_block_decoder(codes: dict[int, str]) -> None:
+    """
+    Build the decoder shared by all the blocks a worker process decodes.
+    Only ever run in pool workers: the calling process may decode several
+    blobs at once from different threads.
+    """
+    global _block_decoder
+    _block_decoder = _make_decoder(codes, bytes)
+
+def _decode_block(packed: bytes, bit_length: int, count: int) -> bytes:
+    """
+    Decode one block in a worker process.
+    """
+    return _block_decoder(packed, bit_length, count)
+
+def _use_pool(workers: int, block_count: int) -> bool:
+    """
+    Check whether blocks are worth sending to a process pool: more than one worker and more than one block.
+    """
+    return workers > 1 and block_count > 1
+
+def _map_blocks(function: Any, workers: int, *arguments: Sequence, initializer: Optional[Callable] = None,
+                initargs: tuple = ()) -> list:
+    """
+    Apply function to the blocks in a process pool, or in this process when
+    _use_pool() says a pool is not worth it. initializer runs once in each
+    pool worker, and never in this process.
+    """
+    if not _use_pool(workers, len(arguments[0])):
+        return list(map(function, *arguments))
+    with ProcessPoolExecutor(max_workers=min(workers, len(arguments[0])), initializer=initializer,
+                             initargs=initargs) as pool:
+        return list(pool.map(function, *arguments))
+
+def huffman_compress_parallel(data: Any, workers: Optional[int] = None, block_size: int = 1 << 20,
+                              max_code_length: Optional[int] = None) -> bytes:
+    """
+    Encode a bytes-like object with a pool of worker processes.
+
+    The input is cut into blocks. The workers count the bytes of each
+    block, the counts are added up into one shared code table, and the
+    workers then encode the blocks independently. The output starts with
+    the table and an index holding, for every block, its byte count, bit
+    count and encoded size, so each block can be found and decoded on its
+    own.
+
+    Parameters:
+    -----------
+    data : Any
+        A bytes-like object: bytes, bytearray, memoryview, mmap, array...
+    workers : Optional[int]
+        The number of worker processes, by default the number of CPUs.
+    block_size : int
+        The number of bytes per block.
+    max_code_length : Optional[int]
+        The maximum code length, or None for no limit.
+
+    Returns:
+    --------
+    bytes
+        The encoded data, to be decoded by huffman_decompress_parallel.
+    """
+    if block_size <= 0:
+        raise ValueError("Block size must be positive.")
+    workers = workers or os.cpu_count() or 1
+
+    view = memoryview(data).cast('B')
+    # Blocks are copied out of the view once, to be sent to the workers
+    blocks = [bytes(view[start:start + block_size]) for start in range(0, len(view), block_size)]
+
+    frequencies = [0] * 256
+    for block_frequencies in _map_blocks(byte_frequencies, workers, blocks):
+        frequencies = [total + count for total, count in zip(frequencies, block_frequencies)]
+    frequency = {value: count for value, count in enumerate(frequencies) if count}
+
+    lengths = huffman_code_lengths(frequency, max_code_length)
+    table = [None] * 256
+    for value, code in canonical_codes(lengths).items():
+        table[value] = code
+    encoded = _map_blocks(_encode_block, workers, blocks, [table] * len(blocks))
+
+    out = bytearray(_PARALLEL_MAGIC)
+    _write_varint(out, len(blocks))
+    out += serialize_code_lengths(lengths)
+    for block, (packed, bit_length) in zip(blocks, encoded):
+        _write_varint(out, len(block))
+        _write_varint(out, bit_length)
+        _write_varint(out, len(packed))
+    for packed, _ in encoded:
+        out += packed
+    return bytes(out)
+
+def huffman_decompress_parallel(blob: Any, workers: Optional[int] = None) -> bytes:
+    """
+    Decode data produced by huffman_compress_parallel, one block per task in a process pool.
+
+    Parameters:
+    -----------
+    blob : Any
+        The encoded data (any bytes-like object).
+    workers : Optional[int]
+        The number of worker processes, by default the number of CPUs.
+
+    Returns:
+    --------
+    bytes
+        The decoded data.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    view = memoryview(blob).cast('B')
+    if bytes(view[:len(_PARALLEL_MAGIC)]) != _PARALLEL_MAGIC:
+        raise ValueError("Not parallel Huffman-encoded data.")
+    block_count, offset = _read_varint(view, len(_PARALLEL_MAGIC))
+    lengths, offset = deserialize_code_lengths(view, offset, text=False)
+
+    index = []
+    for _ in range(block_count):
+        count, offset = _read_varint(view, offset)
+        bit_length, offset = _read_varint(view, offset)
+        size, offset = _read_varint(view, offset)
+        index.append((count, bit_length, size))
+
+    blocks = []
+    for count, bit_length, size in index:
+        if offset + size > len(view):
+            raise ValueError("Truncated Huffman data.")
+        blocks.append(bytes(view[offset:offset + size]))
+        offset += size
+
+    codes = canonical_codes(lengths)
+    bit_lengths = [bit_length for _, bit_length, _ in index]
+    counts = [count for count, _, _ in index]
+    if _use_pool(workers, block_count):
+        decoded = _map_blocks(_decode_block, workers, blocks, bit_lengths, counts,
+                              initializer=_init_block_decoder, initargs=(codes,))
+    else:
+        # A local decoder: the module-level one belongs to pool workers
+        decoded = list(map(_make_decoder(codes, bytes), blocks, bit_lengths, counts))
+    return b''.join(decoded)
+
+def _sample_text(size: int, seed: int = 0) -> str:
+    """
+    Generate text with a skewed, English-like character distribution for benchmarks.
+
+    Parameters:
+    -----------
+    size : int
+        The number of characters.
+    seed : int
+        The seed of the random generator.
+
+    Returns:
+    --------
+    str
+        The generated text.
+    """
+    alphabet = " etaoinshrdlcumwfgypbvkjxqz.,ETAOINSHRDLCUMWFGYPBVKJXQZ0123456789"
+    weights = [1.0 / (rank + 1) for rank in range(len(alphabet))]
+    block = ''.join(random.Random(seed).choices(alphabet, weights, k=min(size, 1 << 20)))
+    return (block * (size // len(block) + 1))[:size]
+
+def benchmark_decoders(size_mb: int = 100) -> None:
+    """
+    Print the throughput, in MB/s of decoded text, of the bit-by-bit tree walk
+    of huffman_decoding and of the table-driven huffman_decoding_fast.
+
+    Parameters:
+    -----------
+    size_mb : int
+        The size of the benchmark input, in megabytes.
+    """
+    size = size_mb * 1_000_000
+    print(f"Generating {size_mb} MB of text...")
+    data = _sample_text(size)
+
+    print(f"{'decoder':>12} {'seconds':>9} {'MB/s':>8}")
+
+    encoded_data, tree = huffman_encoding(data)
+    start = time.perf_counter()
+    decoded_data = huffman_decoding(encoded_data, tree)
+    elapsed = time.perf_counter() - start
+    assert decoded_data == data
+    print(f"{'tree walk':>12} {elapsed:9.2f} {size_mb / elapsed:8.2f}")
+    del encoded_data, decoded_data
+
+    packed, bit_length, tree = huffman_encoding_packed(data)
+    start = time.perf_counter()
+    decoded_data = huffman_decoding_fast(packed, bit_length, tree)
+    elapsed = time.perf_counter() - start
+    assert decoded_data == data
+    print(f"{'table':>12} {elapsed:9.2f} {size_mb / elapsed:8.2f}")
+
+def benchmark_parallel_compression(size_mb: int = 64, worker_counts: tuple[int, ...] = (1, 2, 4, 8, 16, 32)) -> None:
+    """
+    Print the compression and decompression time and speedup of the
+    parallel byte codec for each number of worker processes.
+
+    Parameters:
+    -----------
+    size_mb : int
+        The size of the benchmark input, in megabytes.
+    worker_counts : Tuple[int, ...]
+        The pool sizes to measure; those above the number of CPUs are skipped.
+    """
+    print(f"Generating {size_mb} MB of data...")
+    data = _sample_text(size_mb * 1_000_000).encode('ascii')
+    cpus = os.cpu_count() or 1
+
+    print(f"{'workers':>8} {'compress s':>11} {'speedup':>8} {'decompress s':>13} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        if workers > cpus:
+            continue
+        start = time.perf_counter()
+        blob = huffman_compress_parallel(data, workers=workers)
+        compress_time = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = huffman_decompress_parallel(blob, workers=workers)
+        decompress_time = time.perf_counter() - start
+        assert decoded == data
+
+        if baseline is None:
+            baseline = compress_time, decompress_time
+        print(f"{workers:>8} {compress_time:11.2f} {baseline[0] / compress_time:8.2f}"
+              f" {decompress_time:13.2f} {baseline[1] / decompress_time:8.2f}")
+
+def _benchmark_input(distribution: str, size: int, seed: int = 0) -> str:
+    """
+    Generate benchmark input of the given distribution.
+
+    Parameters:
+    -----------
+    distribution : str
+        'uniform' (64 equally likely characters), 'skewed' (26 letters with
+        halving probabilities), 'english' (English-like letter frequencies)
+        or 'binary' (random bytes, as the characters 0-255).
+    size : int
+        The number of characters.
+    seed : int
+        The seed of the random generator.
+
+    Returns:
+    --------
+    str
+        The generated input.
+    """
+    if distribution == 'english':
+        return _sample_text(size, seed)
+
+    generator = random.Random(seed)
+    block_size = min(size, 1 << 20)
+    if distribution == 'uniform':
+        alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ."
+        block = ''.join(generator.choices(alphabet, k=block_size))
+    elif distribution == 'skewed':
+        alphabet = "abcdefghijklmnopqrstuvwxyz"
+        block = ''.join(generator.choices(alphabet, [2.0 ** -i for i in range(26)], k=block_size))
+    elif distribution == 'binary':
+        block = generator.randbytes(block_size).decode('latin-1')
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    return (block * (size // block_size + 1))[:size]
+
+def _benchmark_case(data: str) -> dict[str, Any]:
+    """
+    Measure the phases of the Huffman functions, the peak memory of encoding
+    and decoding, and the compression ratio for one input.
+
+    Parameters:
+    -----------
+    data : str
+        The input string.
+
+    Returns:
+    --------
+    Dict[str, Any]
+        The seconds of each phase, the peak memory in bytes and the compression ratio.
+    """
+    phases = {}
+
+    start = time.perf_counter()
+    frequency = calculate_frequencies(data)
+    phases['calculate_frequencies'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree = build_huffman_tree(frequency)
+    phases['build_huffman_tree'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_huffman_codes(tree, '', {})
+    phases['generate_huffman_codes'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded_data, tree = huffman_encoding(data)
+    phases['huffman_encoding'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded_data = huffman_decoding(encoded_data, tree)
+    phases['huffman_decoding'] = time.perf_counter() - start
+    assert decoded_data == data
+
+    # The compression ratio counts eight encoded bits per byte, against one byte per input character
+    ratio = len(encoded_data) / 8 / len(data)
+    del encoded_data, decoded_data
+
+    # Memory is traced in a separate run, as tracing slows the timed one down
+    tracemalloc.start()
+    try:
+        encoded_data, tree = huffman_encoding(data)
+        huffman_decoding(encoded_data, tree)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'phases': phases, 'peak_memory': peak_memory, 'ratio': ratio}
+
+def compare_to_baseline(results: dict[str, Any], baseline: dict[str, Any], tolerance: float = 0.25,
+                        min_seconds: float = 0.001) -> list[str]:
+    """
+    List the measurements of results that are worse than the baseline by
+    more than tolerance.
+
+    Parameters:
+    -----------
+    results : Dict[str, Any]
+        The results of run_benchmark_suite.
+    baseline : Dict[str, Any]
+        Earlier results of run_benchmark_suite.
+    tolerance : float
+        The allowed relative slowdown or memory growth.
+    min_seconds : float
+        Phases faster than this in the baseline are too noisy to compare.
+
+    Returns:
+    --------
+    List[str]
+        A description of each regression.
+    """
+    regressions = []
+    for case, result in results['cases'].items():
+        reference = baseline.get('cases', {}).get(case)
+        if reference is None:
+            continue
+        for phase, seconds in result['phases'].items():
+            previous = reference['phases'].get(phase)
+            if previous is not None and previous >= min_seconds and seconds > previous * (1 + tolerance):
+                regressions.append(f"{case} {phase}: {previous:.4f}s -> {seconds:.4f}s")
+        if result['peak_memory'] > reference['peak_memory'] * (1 + tolerance):
+            regressions.append(f"{case} peak memory: {reference['peak_memory']:,} -> {result['peak_memory']:,} bytes")
+    return regressions
+
+def run_benchmark_suite(sizes: tuple[int, ...] = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+                        distributions: tuple[str, ...] = ('uniform', 'skewed', 'english', 'binary'),
+                        baseline_path: str = 'huffman_baseline.json', update_baseline: bool = False,
+                        tolerance: float = 0.25) -> dict[str, Any]:
+    """
+    Benchmark the Huffman functions on every distribution and size.
+
+    For each case it prints the time of calculate_frequencies,
+    build_huffman_tree, generate_huffman_codes, huffman_encoding and
+    huffman_decoding, the peak memory of encoding plus decoding, and the
+    compression ratio. The results are compared with the baseline saved at
+    baseline_path, and any regression beyond tolerance is printed. The
+    results are saved as the baseline when there is none yet, or when
+    update_baseline is set.
+
+    Parameters:
+    -----------
+    sizes : Tuple[int, ...]
+        The input sizes, in characters (one byte each).
+    distributions : Tuple[str, ...]
+        The input distributions, as accepted by _benchmark_input.
+    baseline_path : str
+        The JSON file holding the baseline.
+    update_baseline : bool
+        Whether to replace an existing baseline with these results.
+    tolerance : float
+        The allowed relative slowdown or memory growth.
+
+    Returns:
+    --------
+    Dict[str, Any]
+        The results, keyed by "distribution/size" under 'cases'.
+    """
+    results = {'python': sys.version.split()[0], 'cases': {}}
+    phase_names = ('calculate_frequencies', 'build_huffman_tree', 'generate_huffman_codes',
+                   'huffman_encoding', 'huffman_decoding')
+    print(f"{'case':>18} " + ' '.join(f"{name[:12]:>12}" for name in phase_names) + f" {'peak MB':>9} {'ratio':>6}")
+
+    for distribution in distributions:
+        for size in sizes:
+            case = f"{distribution}/{size}"
+            result = _benchmark_case(_benchmark_input(distribution, size))
+            results['cases'][case] = result
+            print(f"{case:>18} " + ' '.join(f"{result['phases'][name]:12.4f}" for name in phase_names)
+                  + f" {result['peak_memory'] / 1e6:9.1f} {result['ratio']:6.3f}")
+
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as file:
+            regressions = compare_to_baseline(results, json.load(file), tolerance)
+        print(f"{len(regressions)} regression(s) against {baseline_path}")
+        for regression in regressions:
+            print("  " + regression)
+    if update_baseline or not os.path.exists(baseline_path):
+        with open(baseline_path, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    return results
+
+
 # Main Function
 if __name__ == "__main__":
     # Test Case 1: Standard test case
@@ -250,3 +1683,204 @@ if __name__ == "__main__":
         assert sentence == ""
     else:
         print("Error: Empty string not handled correctly!")
+
+    # Test Case 6: Packed output is about eight times smaller than the bit string
+    print("\nTest Case 6: Bit-packed output")
+    sentence = "The quick brown fox jumps over the lazy dog. " * 50
+    encoded_data, tree = huffman_encoding(sentence)
+    packed, bit_length, packed_tree = huffman_encoding_packed(sentence)
+    print("Bit string length:", len(encoded_data), "Packed bytes:", len(packed), "Input length:", len(sentence))
+    assert bit_length == len(encoded_data)
+    assert len(packed) == (bit_length + 7) // 8 < len(sentence)
+    decoded_data = huffman_decoding_packed(packed, bit_length, packed_tree)
+    print("Decoded matches:", decoded_data == sentence)
+    assert decoded_data == sentence
+
+    # Test Case 7: Packed round trips across chunk boundaries and for a single character
+    print("\nTest Case 7: Packed round trips")
+    for sentence in ("ab" * 70_000 + "c", "Z" * 13):
+        packed, bit_length, tree = huffman_encoding_packed(sentence)
+        assert huffman_decoding_packed(packed, bit_length, tree) == sentence
+    print("Round trips passed")
+
+    # Test Case 8: The table-driven decoder matches the tree walk
+    print("\nTest Case 8: Table-driven decoding")
+    for sentence in ("Huffman coding is fun!", "aaaaaaabbbbbcccd", "AAAAAAA", _sample_text(200_000, seed=1)):
+        packed, bit_length, tree = huffman_encoding_packed(sentence)
+        assert huffman_decoding_fast(packed, bit_length, tree) == sentence
+    print("Decoded matches: True")
+
+    # Test Case 9: Codes longer than the primary table (Fibonacci frequencies give a deep tree)
+    print("\nTest Case 9: Long codes")
+    fibonacci = [1, 1]
+    while len(fibonacci) < 20:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+    sentence = ''.join(chr(ord('A') + i) * count for i, count in enumerate(fibonacci))
+    packed, bit_length, tree = huffman_encoding_packed(sentence)
+    codes = {}
+    generate_huffman_codes(tree, '', codes)
+    print("Longest code:", max(len(code) for code in codes.values()))
+    # Expected output: Longest code: 19
+    assert huffman_decoding_fast(packed, bit_length, tree) == sentence
+
+    # Test Case 10: Canonical codes are a prefix code with the tree's lengths
+    print("\nTest Case 10: Canonical codes")
+    lengths = code_lengths_from_tree(build_huffman_tree(calculate_frequencies("aaaaaaabbbbbcccd")))
+    codes = canonical_codes(lengths)
+    print("Codes:", codes)
+    # Expected output: Codes: {'a': '0', 'b': '10', 'c': '110', 'd': '111'}
+    assert all(len(codes[char]) == lengths[char] for char in lengths)
+
+    # Test Case 11: Self-describing format decodes without the tree
+    print("\nTest Case 11: Self-describing format")
+    for sentence in ("Huffman coding is fun!", "AAAAAAA", "", "héllo wörld ✓ " * 100):
+        blob = huffman_compress(sentence)
+        assert huffman_decompress(blob) == sentence
+    print("Compressed size:", len(blob), "Header size:", len(serialize_code_lengths(lengths)))
+    # Expected output: Compressed size: 580 Header size: 9
+    try:
+        huffman_decompress(b"not huffman")
+    except ValueError as error:
+        print("Error:", error)
+    # Expected output: Error: Not Huffman-encoded data.
+
+    # Test Case 12: Streaming round trips, with shared and per-block tables, text and bytes
+    print("\nTest Case 12: Streaming")
+    import io
+    sentence = _sample_text(50_000, seed=2) + "ünïcode"
+    for shared in (True, False):
+        for source, target in ((io.StringIO(sentence), io.StringIO()),
+                               (io.BytesIO(sentence.encode()), io.BytesIO())):
+            compressed = io.BytesIO()
+            huffman_compress_stream(source, compressed, block_size=4096, shared_table=shared)
+            compressed.seek(0)
+            huffman_decompress_stream(compressed, target)
+            assert target.getvalue() in (sentence, sentence.encode())
+        print("Shared table:", shared, "Compressed size:", len(compressed.getvalue()))
+
+    # Test Case 13: Empty and non-seekable streams
+    print("\nTest Case 13: Empty and non-seekable streams")
+    compressed = io.BytesIO()
+    print("Encoded:", huffman_compress_stream(io.StringIO(""), compressed))
+    # Expected output: Encoded: 0
+    compressed.seek(0)
+    target = io.StringIO()
+    print("Decoded:", huffman_decompress_stream(compressed, target), repr(target.getvalue()))
+    # Expected output: Decoded: 0 ''
+    source = io.BytesIO(b"abracadabra" * 100)
+    source.seekable = lambda: False
+    compressed = io.BytesIO()
+    huffman_compress_stream(source, compressed, block_size=300)
+    compressed.seek(0)
+    target = io.BytesIO()
+    huffman_decompress_stream(compressed, target)
+    assert target.getvalue() == b"abracadabra" * 100
+    print("Non-seekable round trip passed")
+
+    # Test Case 14: In-place code lengths are as short as the tree's
+    print("\nTest Case 14: Linear-time code lengths")
+    generator = random.Random(3)
+    for size in (2, 3, 10, 300):
+        frequency = {chr(0x100 + i): generator.randint(1, 1000) for i in range(size)}
+        lengths = huffman_code_lengths(frequency)
+        tree_lengths = code_lengths_from_tree(build_huffman_tree(frequency))
+        assert sum(frequency[char] * lengths[char] for char in frequency) == \
+            sum(frequency[char] * tree_lengths[char] for char in frequency)
+        assert sum(2.0 ** -length for length in lengths.values()) == 1.0
+    print("Same total length as the tree: True")
+
+    # Test Case 15: Length-limited codes with package-merge
+    print("\nTest Case 15: Length-limited codes")
+    frequency = {chr(ord('A') + i): count for i, count in enumerate(fibonacci)}
+    print("Unlimited:", max(huffman_code_lengths(frequency).values()),
+          "Limited:", max(huffman_code_lengths(frequency, max_length=8).values()))
+    # Expected output: Unlimited: 19 Limited: 8
+    assert sum(2.0 ** -length for length in huffman_code_lengths(frequency, 8).values()) <= 1.0
+    sentence = ''.join(char * count for char, count in frequency.items())
+    assert huffman_decompress(huffman_compress(sentence, max_code_length=8)) == sentence
+    try:
+        huffman_code_lengths(frequency, max_length=4)
+    except ValueError as error:
+        print("Error:", error)
+    # Expected output: Error: 20 symbols do not fit in codes of 4 bits.
+
+    # Test Case 16: Bytes-like inputs, including a memory-mapped file
+    print("\nTest Case 16: Byte-oriented codec")
+    import mmap
+    import tempfile
+    payload = bytes(random.Random(4).choices(range(256), weights=[1 / (i + 1) for i in range(256)], k=20_000))
+    for data in (payload, bytearray(payload), memoryview(payload)[100:5000], b"", b"\x00" * 9):
+        assert huffman_decompress(huffman_compress_bytes(data)) == bytes(data)
+    with tempfile.TemporaryFile() as file:
+        file.write(payload)
+        file.flush()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            blob = huffman_compress_bytes(mapped)
+    print("Input size:", len(payload), "Compressed smaller:", len(blob) < len(payload))
+    # Expected output: Input size: 20000 Compressed smaller: True
+    assert huffman_decompress(blob) == payload
+    print("Frequency of byte 0:", byte_frequencies(b"\x00\x01\x00")[0])
+    # Expected output: Frequency of byte 0: 2
+
+    # Test Case 17: Parallel compression with a block index
+    print("\nTest Case 17: Parallel compression")
+    data = _sample_text(300_000, seed=5).encode('ascii')
+    blob = huffman_compress_parallel(data, workers=2, block_size=64_000)
+    print("Blocks:", _read_varint(blob, len(_PARALLEL_MAGIC))[0])
+    # Expected output: Blocks: 5
+    assert huffman_decompress_parallel(blob, workers=2) == data
+    assert huffman_decompress_parallel(huffman_compress_parallel(b"", workers=2)) == b""
+    print("Parallel round trip passed")
+
+    # Test Case 18: Benchmark suite on small inputs, with a baseline comparison
+    print("\nTest Case 18: Benchmark suite")
+    with tempfile.TemporaryDirectory() as directory:
+        baseline_path = os.path.join(directory, "baseline.json")
+        results = run_benchmark_suite(sizes=(1_000,), baseline_path=baseline_path)
+        assert set(results['cases']) == {"uniform/1000", "skewed/1000", "english/1000", "binary/1000"}
+        slower = json.loads(json.dumps(results))
+        slower['cases']['skewed/1000']['phases']['huffman_decoding'] += 1
+        print("Regressions:", len(compare_to_baseline(slower, results, min_seconds=0)))
+        # Expected output: Regressions: 1
+
+    # Test Case 19: Large alphabets use the tree walk instead of a huge transition table
+    print("\nTest Case 19: Large alphabet")
+    sentence = ''.join(random.Random(6).choices([chr(0x4E00 + i) for i in range(5000)], k=200_000))
+    start = time.perf_counter()
+    assert huffman_decompress(huffman_compress(sentence)) == sentence
+    print("Round trip under 10 s:", time.perf_counter() - start < 10)
+    # Expected output: Round trip under 10 s: True
+    try:
+        _tree_decode(b"\xff", 8, _build_decode_tree({'a': '0', 'b': '10'}), 3, str)
+    except ValueError as error:
+        print("Error:", error)
+    # Expected output: Error: Invalid Huffman code in input.
+
+    # Test Case 20: In-process parallel decoding from several threads at once
+    print("\nTest Case 20: Concurrent in-process decoding")
+    import threading
+    inputs = [_sample_text(20_000, seed=7).encode('ascii'), bytes(range(256)) * 80]
+    blobs = [huffman_compress_parallel(data, workers=1, block_size=4096) for data in inputs]
+    failures = []
+
+    def decode_repeatedly(which: int) -> None:
+        for _ in range(20):
+            try:
+                if huffman_decompress_parallel(blobs[which], workers=1) != inputs[which]:
+                    failures.append(which)
+            except ValueError:
+                failures.append(which)
+
+    threads = [threading.Thread(target=decode_repeatedly, args=(which,)) for which in (0, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print("Wrong results:", len(failures))
+    # Expected output: Wrong results: 0
+
+    if "--bench" in sys.argv:
+        benchmark_decoders()
+        benchmark_parallel_compression()
+    if "--suite" in sys.argv:
+        run_benchmark_suite(update_baseline="--update-baseline" in sys.argv)
@@ -10,6 +10,11 @@ class Group:
         A list of sub-groups within this group.
     users : list[str]
         A list of users in this group.
+    parents : list[Group]
+        The groups this group has been added to.
+    reachable_users : set[str]
+        The users of this group and of all its sub-groups, direct or nested.
+        add_user and add_group keep it up to date.
     """
 
     def __init__(self, _name: str) -> None:
@@ -24,6 +29,8 @@ class Group:
         self.name: str = _name
         self.groups: list[Group] = []
         self.users: list[str] = []
+        self.parents: list[Group] = []
+        self.reachable_users: set[str] = set()
 
     def add_group(self, group: 'Group') -> None:
         """
@@ -35,6 +42,8 @@ class Group:
             The sub-group to be added.
         """
         self.groups.append(group)
+        group.parents.append(self)
+        self._propagate(group.reachable_users)
 
     def add_user(self, user: str) -> None:
         """
@@ -46,6 +55,30 @@ class Group:
             The user to be added.
         """
         self.users.append(user)
+        self._propagate({user})
+
+    def _propagate(self, users: set[str]) -> None:
+        """
+        Add users to the reachable users of this group and of all its ancestors.
+
+        A group that already reaches a user passes it on no further, because
+        its ancestors reach it too. Each ancestor is therefore updated only
+        with the users that are new to it, and cycles end the walk.
+
+        Parameters:
+        -----------
+        users : set[str]
+            The users that became reachable from this group.
+        """
+        stack = [(self, users)]
+
+        while stack:
+            current_group, new_users = stack.pop()
+            new_users = new_users - current_group.reachable_users
+            if not new_users:
+                continue
+            current_group.reachable_users |= new_users
+            stack.extend((parent, new_users) for parent in current_group.parents)
 
     def get_groups(self) -> list['Group']:
         """
@@ -100,19 +133,8 @@ def is_user_in_group(user: str, group: Group) -> bool:
     if user is None:
         return False
 
-    # Use a stack to implement an iterative depth-first search
-    stack = [group]
-
-    while stack:
-        current_group = stack.pop()
-        # Check if the user is directly in this group
-        if user in current_group.get_users():
-            return True
-
-        # Add all subgroups to the stack for further exploration
-        stack.extend(current_group.get_groups())
-
-    return False
+    # The index of reachable users is kept up to date by add_user and add_group
+    return user in group.reachable_users
 
 if __name__ == "__main__":
     # Creating groups and users
@@ -156,3 +178,23 @@ if __name__ == "__main__":
     root_group.add_user("root_user")
     print(is_user_in_group("root_user", root_group))  # Expected output: True
     print(is_user_in_group("non_existent_user", root_group))  # Expected output: False
+
+    # Test Case 7: Users and groups added after the hierarchy is linked
+    print("\nTest Case 7: Incremental updates")
+    late_group = Group("late_group")
+    sub_child.add_group(late_group)
+    late_group.add_user("late_user")
+    print(is_user_in_group("late_user", parent))  # Expected output: True
+    print(is_user_in_group("late_user", late_group))  # Expected output: True
+    print(is_user_in_group("parent_user", child))  # Expected output: False
+
+    # Test Case 8: Shared sub-group and a cycle
+    print("\nTest Case 8: Shared sub-group and cycle")
+    left, right, shared = Group("left"), Group("right"), Group("shared")
+    left.add_group(shared)
+    right.add_group(shared)
+    shared.add_group(left)
+    shared.add_user("shared_user")
+    right.add_user("right_user")
+    print(is_user_in_group("shared_user", left), is_user_in_group("shared_user", right))  # Expected output: True True
+    print(is_user_in_group("right_user", left))  # Expected output: False